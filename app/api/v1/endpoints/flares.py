@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.flare import Flare
-from app.utils.database import get_db
+from app.schemas.flare import FlareOut
+from app.utils.database import get_async_db, get_db
+from app.utils.flare_queries import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, flare_page_query
 
 router = APIRouter()
 
-@router.get("/flares/")
-def get_flares(db: Session = Depends(get_db)):
-    return db.query(Flare).all()
+@router.get("/flares/", response_model=List[FlareOut])
+async def get_flares(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        query = flare_page_query(cursor=cursor, limit=limit, base=select(Flare))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return (await db.scalars(query)).all()
 
-@router.post("/flares/")
+@router.post("/flares/", response_model=FlareOut)
 def create_flare(flare_data: dict, db: Session = Depends(get_db)):
     flare = Flare(**flare_data)
     db.add(flare)
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime
+from app.utils.database import Base
+
+# Single-row counter bumped whenever the scraper commits new or changed flares
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Always 1
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,28 +1,50 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
 
+# Key order of the list endpoint, (submittal_date DESC NULLS LAST, id DESC), for its composite
+# indexes on Postgres: a backward scan of an ascending index would give NULLS FIRST instead
+NEWEST_FIRST = {"submittal_date": "DESC NULLS LAST", "id": "DESC"}
+
 class Flare(Base):
     __tablename__ = "flares"
 
+    # On Postgres the table is range-partitioned by submittal_date (see app.utils.flare_partitions).
+    # A partitioned table's primary key would have to include the nullable partition column,
+    # so there the id is only indexed, and stays unique through the flares_id_seq sequence.
     id = Column(Integer, primary_key=True, index=True)
     exception_number = Column(String, nullable=True)
     submittal_date = Column(DateTime, nullable=True)
     filing_number = Column(String, nullable=True)
     status = Column(String, nullable=True)
     filing_type = Column(String, nullable=True)
-    operator_number = Column(String, nullable=True)
-    operator_name = Column(String, nullable=True)
     property = Column(String, nullable=True)
     effective_date = Column(DateTime, nullable=True)
     expiration_date = Column(DateTime, nullable=True)
-    fv_district = Column(String, nullable=True)
-    location_id = Column(Integer, ForeignKey("locations.id"))
-    operator_id = Column(Integer, ForeignKey("operators.id"))
+    location_id = Column(Integer, ForeignKey("locations.id"))  # FV district, by name
+    operator_id = Column(Integer, ForeignKey("operators.id"))  # Operator, by operator number
     volume = Column(Float, nullable=True)  # Ensure this column exists
     duration = Column(Float, nullable=True)  # Ensure this column exists
     h2s = Column(Float, nullable=True)  # Ensure this column exists
     date = Column(DateTime, nullable=True)  # Ensure this column exists
 
     location = relationship("Location", back_populates="flares")
-    operator = relationship("Operator", back_populates="flares")
\ No newline at end of file
+    operator = relationship("Operator", back_populates="flares")
+
+    # Natural key of a filing, plus composite indexes for the filtered list endpoint
+    __table_args__ = (
+        UniqueConstraint(
+            "exception_number",
+            "filing_number",
+            "submittal_date",
+            name="uq_flares_exception_number_filing_number_submittal_date",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index("ix_flares_submittal_date_id", "submittal_date", "id", postgresql_ops=NEWEST_FIRST),
+        Index("ix_flares_status_submittal_date_id", "status", "submittal_date", "id", postgresql_ops=NEWEST_FIRST),
+        Index("ix_flares_filing_type_submittal_date_id", "filing_type", "submittal_date", "id", postgresql_ops=NEWEST_FIRST),
+        Index("ix_flares_operator_id_submittal_date_id", "operator_id", "submittal_date", "id", postgresql_ops=NEWEST_FIRST),
+        Index("ix_flares_location_id_submittal_date_id", "location_id", "submittal_date", "id", postgresql_ops=NEWEST_FIRST),
+        # Trigram index for substring search on Postgres (pg_trgm)
+        Index("ix_flares_property_trgm", "property", postgresql_using="gin", postgresql_ops={"property": "gin_trgm_ops"}),
+    )
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Date
+from app.utils.database import Base
+
+# Flare counts per submittal month and dimension combination
+class FlareMonthlyRollup(Base):
+    __tablename__ = "flare_monthly_rollups"
+
+    month = Column(Date, primary_key=True)  # First day of the submittal month
+    operator_number = Column(String, primary_key=True)  # "" when the flare has none
+    fv_district = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    filing_type = Column(String, primary_key=True)
+    flare_count = Column(Integer, nullable=False)
+
+# Flare counts per effective month, expiration month and status
+class FlareActiveRollup(Base):
+    __tablename__ = "flare_active_rollups"
+
+    effective_month = Column(Date, primary_key=True)
+    expiration_month = Column(Date, primary_key=True)  # 9999-12-01 when the exception has no expiration
+    status = Column(String, primary_key=True)
+    flare_count = Column(Integer, nullable=False)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Float, Index
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
 
@@ -6,6 +6,10 @@ class Location(Base):
     __tablename__ = "locations"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)  # Location name
-    coordinates = Column(String)  # Latitude and longitude
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
 
-    flares = relationship("Flare", back_populates="location")
\ No newline at end of file
+    flares = relationship("Flare", back_populates="location")
+
+    # Serves the bounding-box lookups of the map queries
+    __table_args__ = (Index("ix_locations_latitude_longitude", "latitude", "longitude"),)
\ No newline at end of file
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
 
 class Operator(Base):
     __tablename__ = "operators"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True)  # Operator name
+    operator_number = Column(String, nullable=True)  # RRC operator number, the canonical key
+    name = Column(String, index=True)  # Operator name filed with the number
 
-    flares = relationship("Flare", back_populates="operator")
\ No newline at end of file
+    flares = relationship("Flare", back_populates="operator")
+
+    # One row per operator number, plus a trigram index for substring search on Postgres (pg_trgm)
+    __table_args__ = (
+        UniqueConstraint("operator_number", name="uq_operators_operator_number"),
+        Index("ix_operators_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
\ No newline at end of file
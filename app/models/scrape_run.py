@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, Index, text
+from sqlalchemy.sql import func
+from app.utils.database import Base
+
+class ScrapeRun(Base):
+    __tablename__ = "scrape_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, stopped or failed
+    incremental = Column(Boolean, nullable=False, default=False)
+    options = Column(JSON, nullable=True)  # workers, requests_per_second and fetch_mode of the crawl
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    pid = Column(Integer, nullable=True)  # Process running the crawl
+    last_page = Column(Integer, nullable=False, default=0)  # Last results page fully committed
+    page_size = Column(Integer, nullable=True)  # Rows per results page that last_page counts in
+    rows_written = Column(Integer, nullable=False, default=0)  # Rows scraped and committed so far
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # At most one queued or running crawl, enforced across every API worker
+    __table_args__ = (
+        Index(
+            "uq_scrape_runs_active",
+            text("(status IN ('queued', 'running'))"),
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
\ No newline at end of file
@@ -0,0 +1,98 @@
+import xml.etree.ElementTree as ET
+from urllib.parse import urlencode, urljoin
+
+import httpx
+
+TABLE_ID = "pbqueryForm:pQueryTable"
+
+# Connections kept open to the RRC host across all concurrent page fetches
+MAX_CONNECTIONS = 8
+
+# Reads every field of the query form, including javax.faces.ViewState, and its action URL
+_FORM_STATE_JS = """
+() => {
+    const form = document.getElementById("pbqueryForm");
+    return {action: form.action, fields: Array.from(new FormData(form).entries())};
+}
+"""
+
+
+class AjaxPager:
+    """Fetch results pages by replaying the datatable's JSF partial-request POST.
+
+    A browser session runs the search once to establish the view state and
+    cookies. After that, each page costs one small HTTP request whose
+    partial-response XML carries only the new table rows, instead of a full
+    render in Chromium. The httpx client pools connections across
+    concurrent fetches.
+    """
+
+    def __init__(self, action_url, form_fields, cookies, rows_per_page, user_agent=None):
+        self.action_url = action_url
+        self.form_fields = [(name, value) for name, value in form_fields if name != "javax.faces.ViewState"]
+        self.view_state = dict(form_fields).get("javax.faces.ViewState")
+        self.rows_per_page = rows_per_page
+        headers = {
+            "Faces-Request": "partial/ajax",
+            "X-Requested-With": "XMLHttpRequest",
+            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        }
+        if user_agent:
+            headers["User-Agent"] = user_agent
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            cookies=cookies,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        )
+
+    @classmethod
+    async def from_page(cls, page, rows_per_page):
+        """Capture the view state and cookies of a browser page that already ran the search."""
+        state = await page.evaluate(_FORM_STATE_JS)
+        cookies = {cookie["name"]: cookie["value"] for cookie in await page.context.cookies()}
+        user_agent = await page.evaluate("() => navigator.userAgent")
+        return cls(urljoin(page.url, state["action"]), state["fields"], cookies, rows_per_page, user_agent)
+
+    async def fetch_page_html(self, page_number):
+        """Fetch a 1-based results page and return its rows as table HTML for the row parsers."""
+        data = self.form_fields + [
+            ("javax.faces.partial.ajax", "true"),
+            ("javax.faces.source", TABLE_ID),
+            ("javax.faces.partial.execute", TABLE_ID),
+            ("javax.faces.partial.render", TABLE_ID),
+            ("javax.faces.behavior.event", "page"),
+            ("javax.faces.partial.event", "page"),
+            (f"{TABLE_ID}_pagination", "true"),
+            (f"{TABLE_ID}_first", str((page_number - 1) * self.rows_per_page)),
+            (f"{TABLE_ID}_rows", str(self.rows_per_page)),
+            (f"{TABLE_ID}_skipChildren", "true"),
+            (f"{TABLE_ID}_encodeFeature", "true"),
+            ("javax.faces.ViewState", self.view_state),
+        ]
+        response = await self.client.post(self.action_url, content=urlencode(data))
+        response.raise_for_status()
+        return self._table_html(response.text)
+
+    def _table_html(self, xml):
+        """Pull the table rows out of a partial-response, keeping any refreshed view state."""
+        root = ET.fromstring(xml)
+        error = root.find(".//error")
+        if error is not None:
+            raise RuntimeError(f"JSF partial request failed: {error.findtext('error-message')}")
+
+        rows_html = None
+        for update in root.iter("update"):
+            update_id = update.get("id", "")
+            if update_id == TABLE_ID:
+                rows_html = update.text or ""
+            elif "javax.faces.ViewState" in update_id:
+                self.view_state = update.text
+        if rows_html is None:
+            raise RuntimeError("JSF partial response did not update the results table.")
+
+        # Paginating renders only the body rows, so give the parser a table around them
+        return f"<table><tbody>{rows_html}</tbody></table>"
+
+    async def close(self):
+        await self.client.aclose()
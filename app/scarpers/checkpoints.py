@@ -0,0 +1,51 @@
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models.scrape_run import ScrapeRun
+
+logger = logging.getLogger(__name__)
+
+
+def mark_running(db, run):
+    """Claim a queued run for the current process."""
+    run.status = "running"
+    run.pid = os.getpid()
+    db.commit()
+
+
+def cancel_requested(db, run):
+    """Check whether the API asked this run to stop, reading just that one column."""
+    return db.scalar(select(ScrapeRun.cancel_requested).where(ScrapeRun.id == run.id))
+
+
+def set_page_size(db, run, page_size):
+    """Record the rows per page of this attempt, re-basing a checkpoint taken with another size.
+
+    The checkpoint is rounded down, so rows straddling the old page boundary
+    are scraped again rather than skipped. A checkpoint without a recorded
+    size cannot be converted and restarts from the first page.
+    """
+    if not page_size or run.page_size == page_size:
+        return
+    if run.last_page:
+        run.last_page = run.last_page * run.page_size // page_size if run.page_size else 0
+    run.page_size = page_size
+    db.commit()
+
+
+def record_page(db, run, page_number, rows):
+    """Checkpoint a results page once its rows have been committed."""
+    run.last_page = page_number
+    run.rows_written += rows
+    db.commit()
+
+
+def finish_run(db, run, status, error=None):
+    """Mark the run as completed, stopped or failed."""
+    run.status = status
+    run.error = error
+    run.finished_at = datetime.utcnow()
+    db.commit()
@@ -0,0 +1,31 @@
+# Approximate centre of each Railroad Commission oil and gas district, as (latitude, longitude).
+# Flares are only located to their district in the SWR-32 results, so this is the finest
+# position the scraper can give them without a network lookup.
+DISTRICT_COORDINATES = {
+    "01": (29.20, -98.90),  # San Antonio
+    "02": (28.70, -97.30),  # Victoria / Gulf coast
+    "03": (29.80, -95.60),  # Houston
+    "04": (27.30, -98.10),  # Corpus Christi / South Texas
+    "05": (31.80, -96.40),  # East Central Texas
+    "06": (32.30, -94.70),  # Kilgore
+    "6E": (32.40, -94.90),  # East Texas field
+    "7B": (32.50, -99.40),  # Abilene
+    "7C": (31.20, -100.90),  # San Angelo
+    "08": (31.70, -102.70),  # Midland / Permian Basin
+    "8A": (33.30, -102.10),  # Lubbock
+    "09": (33.40, -98.00),  # Wichita Falls
+    "10": (35.60, -101.30),  # Pampa / Panhandle
+}
+
+
+def normalize_district(name):
+    """Canonical district code: upper case, single-digit districts zero padded ("8" -> "08")."""
+    name = (name or "").strip().upper()
+    if name.isdigit() and len(name) == 1:
+        name = "0" + name
+    return name
+
+
+def district_coordinates(name):
+    """Return the (latitude, longitude) of a district, or (None, None) if it is unknown."""
+    return DISTRICT_COORDINATES.get(normalize_district(name), (None, None))
@@ -0,0 +1,256 @@
+import logging
+from collections import ChainMap
+from datetime import datetime
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.flare import Flare
+from app.models.location import Location
+from app.models.operator import Operator
+from app.scarpers.districts import district_coordinates
+from app.utils.data_version import bump_data_version
+from app.utils.flare_stats import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose INSERT supports ON CONFLICT
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _upsert_insert(db, model):
+    """Return a dialect INSERT with ON CONFLICT support, or None if the dialect lacks it."""
+    insert_fn = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    return insert_fn(model) if insert_fn else None
+
+
+# Identity of an SWR-32 filing: flares holds at most one row per filing
+FILING_KEY = ("exception_number", "filing_number")
+
+# Unique constraint on flares and conflict target of the upsert. It includes the submittal
+# date because flares is partitioned by that date on Postgres, so a filing whose date moved
+# is deleted and inserted again rather than updated (see _delete_moved_flares)
+NATURAL_KEY = FILING_KEY + ("submittal_date",)
+
+# Columns that change over a filing's lifetime and are refreshed on re-scrape
+MUTABLE_COLUMNS = ("status", "effective_date", "expiration_date")
+
+
+def parse_trrc_date(value):
+    """Parse the MM/DD/YYYY dates shown in the SWR-32 results table. Datetimes pass through."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, "%m/%d/%Y") if value else None
+
+
+def _resolve_ids(db, key_column, known, rows_by_key):
+    """Find or create the rows for the keys of `rows_by_key` that are not in `known`.
+
+    `rows_by_key` maps each key a page needs to the column values of a new
+    row. Missing rows are created with a single INSERT. Returns {key: id}
+    for the keys that were not known.
+    """
+    model = key_column.class_
+    missing = rows_by_key.keys() - known.keys()
+    if not missing:
+        return {}
+    found = dict(db.execute(select(key_column, model.id).where(key_column.in_(missing))).all())
+
+    new = missing - found.keys()
+    if new:
+        values = [rows_by_key[key] for key in new]
+        stmt = _upsert_insert(db, model)
+        if stmt is not None:
+            db.execute(stmt.on_conflict_do_nothing(index_elements=[key_column.key]), values)
+        else:
+            db.execute(insert(model), values)
+        found.update(db.execute(select(key_column, model.id).where(key_column.in_(new))).all())
+    return found
+
+
+def _district_location(name):
+    latitude, longitude = district_coordinates(name)
+    return {"latitude": latitude, "longitude": longitude}
+
+
+class DimensionCache:
+    """Location ids by district and operator ids by operator number, kept for a whole crawl.
+
+    warm() loads every known row with one query per table, after which a
+    page only reaches the database for keys it has never seen. Ids of rows
+    created by a page are held back until that page commits, so a rollback
+    cannot leave the cache pointing at rows that were never stored.
+    """
+
+    def __init__(self):
+        self.location_ids = {}
+        self.operator_ids = {}
+        self._pending = ({}, {})
+
+    def warm(self, db):
+        self.location_ids = dict(db.execute(select(Location.name, Location.id)).all())
+        self.operator_ids = dict(
+            db.execute(select(Operator.operator_number, Operator.id).where(Operator.operator_number.is_not(None))).all()
+        )
+
+    def resolve(self, db, page_rows):
+        """Return (location ids by district, operator ids by number) covering every row of a page."""
+        locations = {
+            r.fv_district: {"name": r.fv_district, **_district_location(r.fv_district)}
+            for r in page_rows
+            if r.fv_district is not None
+        }
+        operators = {}
+        for r in page_rows:
+            # A row that names the operator wins over one that leaves the name blank
+            if r.operator_number is not None and (r.operator_name or r.operator_number not in operators):
+                operators[r.operator_number] = {"operator_number": r.operator_number, "name": r.operator_name}
+        self._pending = (
+            _resolve_ids(db, Location.name, self.location_ids, locations),
+            _resolve_ids(db, Operator.operator_number, self.operator_ids, operators),
+        )
+        return ChainMap(self._pending[0], self.location_ids), ChainMap(self._pending[1], self.operator_ids)
+
+    def commit(self):
+        self.location_ids.update(self._pending[0])
+        self.operator_ids.update(self._pending[1])
+        self._pending = ({}, {})
+
+    def discard(self):
+        self._pending = ({}, {})
+
+
+def on_conflict_update_changed(stmt):
+    """Make a dialect INSERT into flares update known filings, but only where a mutable column changed.
+
+    Rows skipped by the WHERE clause are not returned by RETURNING, so the
+    returned ids are exactly the flares inserted or changed.
+    """
+    return stmt.on_conflict_do_update(
+        index_elements=list(NATURAL_KEY),
+        set_={column: stmt.excluded[column] for column in MUTABLE_COLUMNS},
+        where=or_(*(getattr(Flare, column).is_distinct_from(stmt.excluded[column]) for column in MUTABLE_COLUMNS)),
+    ).returning(Flare.id)
+
+
+def _stored_flares(db, values):
+    """The stored flares of the filings in `values`, with their submittal and effective dates."""
+    filings = {tuple(v[c] for c in FILING_KEY) for v in values}
+    stored = db.execute(
+        select(Flare.id, Flare.exception_number, Flare.filing_number, Flare.submittal_date, Flare.effective_date).where(
+            Flare.exception_number.in_({exception_number for exception_number, _ in filings})
+        )
+    ).all()
+    return [row for row in stored if (row.exception_number, row.filing_number) in filings]
+
+
+def _delete_moved_flares(db, values, stored):
+    """Delete the `stored` flares of filings in `values` that now carry another submittal date.
+
+    The upsert then inserts them again under their new date, so a filing
+    keeps a single row.
+    """
+    dates = {tuple(v[c] for c in FILING_KEY): v["submittal_date"] for v in values}
+    moved = [row.id for row in stored if row.submittal_date != dates[(row.exception_number, row.filing_number)]]
+    if moved:
+        db.execute(delete(Flare).where(Flare.id.in_(moved)))
+
+
+def _merge_flares(db, values):
+    """Portable upsert: insert new flares and update changed ones, compared against the stored rows in Python."""
+    existing = {
+        tuple(getattr(row, c) for c in NATURAL_KEY): row
+        for row in db.execute(
+            select(Flare.id, *(getattr(Flare, c) for c in NATURAL_KEY + MUTABLE_COLUMNS)).where(
+                Flare.exception_number.in_({v["exception_number"] for v in values})
+            )
+        )
+    }
+    new_rows, changed_rows = [], []
+    for v in values:
+        current = existing.get(tuple(v[c] for c in NATURAL_KEY))
+        if current is None:
+            new_rows.append(v)
+        elif any(getattr(current, c) != v[c] for c in MUTABLE_COLUMNS):
+            changed_rows.append({"id": current.id, **{c: v[c] for c in MUTABLE_COLUMNS}})
+    if new_rows:
+        db.execute(insert(Flare), new_rows)
+    if changed_rows:
+        db.execute(update(Flare), changed_rows)
+    return len(new_rows) + len(changed_rows)
+
+
+def _upsert_flares(db, values):
+    """Insert new flares and update known ones whose mutable columns changed."""
+    stmt = _upsert_insert(db, Flare)
+    if stmt is None:
+        return _merge_flares(db, values)
+
+    written = 0
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite treats NULLs in a unique index as distinct, so ON CONFLICT never matches an
+        # undated filing; those are matched in Python instead
+        undated = [v for v in values if v["submittal_date"] is None]
+        if undated:
+            written += _merge_flares(db, undated)
+            values = [v for v in values if v["submittal_date"] is not None]
+    if values:
+        written += len(db.execute(on_conflict_update_changed(stmt), values).all())
+    return written
+
+
+def save_flare_page(db, page_rows, dimensions=None):
+    """Write one scraped results page (a list of FlareRow) in a single transaction.
+
+    Any rows with the FlareRow attributes work, with dates as MM/DD/YYYY
+    strings or datetimes, such as validated bulk-upload rows.
+
+    Operators and locations come from `dimensions`, a DimensionCache shared
+    across the pages of a crawl (a fresh one if omitted), and all flares go
+    out in one multi-row upsert on the natural key.
+    Returns the number of flares that were inserted or actually changed, so
+    0 means the page held nothing new.
+    """
+    if not page_rows:
+        return 0
+    dimensions = dimensions or DimensionCache()
+    try:
+        location_ids, operator_ids = dimensions.resolve(db, page_rows)
+
+        # One row per filing: a single upsert cannot touch the same row twice
+        values = {
+            (r.exception_number, r.filing_number): {
+                "exception_number": r.exception_number,
+                "submittal_date": parse_trrc_date(r.submittal_date),
+                "filing_number": r.filing_number,
+                "status": r.status,
+                "filing_type": r.filing_type,
+                "property": r.property,
+                "effective_date": parse_trrc_date(r.effective_date),
+                "expiration_date": parse_trrc_date(r.expiration_date),
+                "location_id": location_ids.get(r.fv_district),
+                "operator_id": operator_ids.get(r.operator_number),
+            }
+            for r in page_rows
+        }
+
+        # Rows stored before the write: the months of their old dates are recounted along with the new
+        stored = _stored_flares(db, values.values())
+        _delete_moved_flares(db, values.values(), stored)
+        written = _upsert_flares(db, list(values.values()))
+        if written:
+            # Keep the stats rollups consistent with the flares they count, and expire cached reads
+            refresh_rollups(db, [*values.values(), *(row._asdict() for row in stored)])
+            bump_data_version(db)
+        db.commit()
+        dimensions.commit()
+        logger.debug(f"Saved page of {len(values)} flares, {written} new or changed")
+        return written
+    except Exception as e:
+        db.rollback()
+        dimensions.discard()
+        logger.error(f"Error saving data to database: {e}")
+        raise
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.scrape_run import ScrapeRun
+from app.scarpers.checkpoints import mark_running
+
+logger = logging.getLogger(__name__)
+
+# Statuses of a crawl that holds the single active slot
+ACTIVE_STATUSES = ("queued", "running")
+
+# Statuses of runs that ended before reaching the last page
+RESUMABLE_STATUSES = ("stopped", "failed")
+
+# A crawl whose worker has not checked in for this long, or that no worker claimed, is presumed dead
+STALE_AFTER = timedelta(minutes=15)
+
+# How often a scrape worker checks in on its running crawl, well inside STALE_AFTER
+HEARTBEAT_INTERVAL = STALE_AFTER / 5
+
+
+class ScrapeAlreadyRunning(Exception):
+    """Raised when a crawl is requested while another one is queued or running."""
+
+
+def expire_stale_runs(db):
+    """Fail active runs that no worker claimed or whose worker stopped checking in, freeing the active slot."""
+    db.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.status.in_(ACTIVE_STATUSES), ScrapeRun.updated_at < datetime.utcnow() - STALE_AFTER)
+        .values(status="failed", error="Scrape worker stopped responding.", finished_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def heartbeat(db, run_id):
+    """Touch a running crawl's updated_at, so one busy between checkpoints is not presumed dead."""
+    db.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.id == run_id, ScrapeRun.status == "running")
+        .values(updated_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def queue_scrape(db, incremental=False, resume=False, **options):
+    """Queue a crawl for a scrape worker (python -m app.worker) to pick up.
+
+    Progress, cancellation and the single-active-crawl rule all go through
+    the scrape_runs table, so any API worker can queue, watch or stop a
+    crawl, and the API process never loads the scraper itself.
+    """
+    expire_stale_runs(db)
+
+    run = None
+    if resume:
+        # Only the latest run can be resumed: once a later one completed, its checkpoint is stale
+        run = db.scalars(select(ScrapeRun).order_by(ScrapeRun.id.desc()).limit(1)).first()
+        if run is not None and run.status not in RESUMABLE_STATUSES:
+            run = None
+    if run is None:
+        run = ScrapeRun(incremental=incremental, options=options)
+        db.add(run)
+    else:
+        logger.info(f"Resuming scrape run {run.id} after page {run.last_page}.")
+        run.status = "queued"
+        run.options = options
+        run.cancel_requested = False
+        run.error = None
+        run.finished_at = None
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ScrapeAlreadyRunning()
+    return run
+
+
+def claim_next_run(db):
+    """Claim the oldest queued run for this process and return its id, or None if there is none.
+
+    FOR UPDATE SKIP LOCKED lets any number of workers poll the queue: a run
+    locked by one worker's claim is invisible to the others.
+    """
+    run = db.scalars(
+        select(ScrapeRun)
+        .where(ScrapeRun.status == "queued")
+        .order_by(ScrapeRun.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if run is None:
+        db.rollback()  # Release the snapshot rather than idle in a transaction until the next poll
+        return None
+    mark_running(db, run)
+    return run.id
+
+
+def request_cancel(db, run_id=None):
+    """Stop the active crawl, or only run `run_id`.
+
+    A run no worker has claimed yet is stopped on the spot, freeing the
+    active slot; a running one is asked to stop after its current page.
+    Returns "stopped" or "cancel_requested", or None if no such run is
+    active.
+    """
+    def active_run(status):
+        stmt = update(ScrapeRun).where(ScrapeRun.status == status)
+        return stmt.where(ScrapeRun.id == run_id) if run_id is not None else stmt
+
+    # Queued first: a run claimed meanwhile is then caught as running by the second update
+    stopped = db.execute(active_run("queued").values(status="stopped", finished_at=datetime.utcnow()))
+    if stopped.rowcount:
+        db.commit()
+        return "stopped"
+    result = db.execute(active_run("running").values(cancel_requested=True))
+    db.commit()
+    return "cancel_requested" if result.rowcount else None
+
+
+def scrape_progress(db):
+    """Summarize the latest crawl with a single indexed lookup."""
+    run = db.scalars(select(ScrapeRun).order_by(ScrapeRun.id.desc()).limit(1)).first()
+    if run is None:
+        return {"is_running": False, "rows_scraped": 0}
+    return {
+        "is_running": run.status in ACTIVE_STATUSES and run.updated_at >= datetime.utcnow() - STALE_AFTER,
+        "rows_scraped": run.rows_written,
+        "run_id": run.id,
+        "status": run.status,
+        "last_page": run.last_page,
+        "cancel_requested": run.cancel_requested,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "error": run.error,
+    }
@@ -0,0 +1,58 @@
+import asyncio
+
+# Bounds for how long a single page transition may take before it is retried
+MIN_WAIT_TIMEOUT = 5.0
+MAX_WAIT_TIMEOUT = 60.0
+
+# Longest extra delay added between requests while the server is struggling
+MAX_BACKOFF = 30.0
+
+
+class RateLimiter:
+    """Space out requests to a host across every browser context sharing it.
+
+    Besides the fixed requests-per-second ceiling, the limiter keeps a moving
+    average of how long the server takes to answer a page transition. Wait
+    timeouts follow that average, and timeouts or unusually slow answers add
+    a backoff delay between requests that decays again once responses are
+    back to normal.
+    """
+
+    def __init__(self, requests_per_second, smoothing=0.2):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.smoothing = smoothing
+        self.latency = None
+        self.backoff = 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Sleep until this caller's slot comes up."""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + max(self.interval, self.backoff)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @property
+    def timeout(self):
+        """Seconds to wait for a page transition, scaled to the observed latency."""
+        if self.latency is None:
+            return MAX_WAIT_TIMEOUT / 2
+        return min(max(self.latency * 4, MIN_WAIT_TIMEOUT) + self.backoff, MAX_WAIT_TIMEOUT)
+
+    def observe(self, latency):
+        """Record how long a page transition took."""
+        if self.latency is not None and latency > self.latency * 3:
+            self.backoff = min(max(self.backoff, latency - self.latency), MAX_BACKOFF)
+        else:
+            self.backoff /= 2
+        self.latency = latency if self.latency is None else (
+            self.smoothing * latency + (1 - self.smoothing) * self.latency
+        )
+
+    def penalize(self):
+        """Back off after a transition timed out."""
+        self.backoff = min(max(self.backoff * 2, 1.0), MAX_BACKOFF)
@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional, BeautifulSoup's html.parser is the fallback
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional
+    LexborHTMLParser = None
+
+# Columns of the pQueryTable results, in table order after the leading select cell
+FLARE_FIELDS = (
+    "exception_number",
+    "submittal_date",
+    "filing_number",
+    "status",
+    "filing_type",
+    "operator_number",
+    "operator_name",
+    "property",
+    "effective_date",
+    "expiration_date",
+    "fv_district",
+)
+
+# One results row, as a compact tuple with named fields
+FlareRow = namedtuple("FlareRow", FLARE_FIELDS)
+
+# Cells a data row must have: the leading select cell plus every field
+_MIN_CELLS = len(FLARE_FIELDS) + 1
+
+
+def _to_row(cells):
+    return FlareRow._make(cells[1:_MIN_CELLS])
+
+
+def parse_rows_bs4(html):
+    """Parse with BeautifulSoup's pure-Python html.parser (slowest, always available)."""
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for tr in soup.select("tr.ui-widget-content"):
+        cells = [td.text.strip() for td in tr.find_all("td")]
+        if len(cells) >= _MIN_CELLS:
+            rows.append(_to_row(cells))
+    return rows
+
+
+def parse_rows_lxml(html):
+    """Parse with libxml2 through lxml."""
+    root = lxml.html.fromstring(f"<div>{html}</div>")
+    rows = []
+    for tr in root.iter("tr"):
+        if "ui-widget-content" not in (tr.get("class") or "").split():
+            continue
+        cells = [td.text_content().strip() for td in tr.iterchildren("td")]
+        if len(cells) >= _MIN_CELLS:
+            rows.append(_to_row(cells))
+    return rows
+
+
+def parse_rows_selectolax(html):
+    """Parse with the Lexbor engine through selectolax."""
+    rows = []
+    for tr in LexborHTMLParser(html).css("tr.ui-widget-content"):
+        cells = [td.text().strip() for td in tr.css("td")]
+        if len(cells) >= _MIN_CELLS:
+            rows.append(_to_row(cells))
+    return rows
+
+
+# Available extractors, fastest first
+PARSERS = {
+    name: parser
+    for name, parser, available in (
+        ("selectolax", parse_rows_selectolax, LexborHTMLParser is not None),
+        ("lxml", parse_rows_lxml, lxml is not None),
+        ("bs4", parse_rows_bs4, True),
+    )
+    if available
+}
+
+# Extractor used by the scraper
+parse_rows = next(iter(PARSERS.values()))
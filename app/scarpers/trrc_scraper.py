@@ -1,155 +1,373 @@
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-from app.models.flare import Flare
-from app.models.location import Location
-from app.models.operator import Operator
+import itertools
+import os
+import re
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, async_playwright
+from app.scarpers.ajax_fetch import AjaxPager
+from app.models.scrape_run import ScrapeRun
+from app.scarpers.checkpoints import cancel_requested, finish_run, mark_running, record_page, set_page_size
+from app.scarpers.flare_writer import DimensionCache, save_flare_page
+from app.scarpers.pacing import RateLimiter
+from app.scarpers.table_parser import parse_rows
 from app.utils.database import SessionLocal
+from app.utils.flare_partitions import ensure_year_partitions
+from app.utils.metrics import SCRAPE_PAGES, SCRAPE_ROWS_WRITTEN, stage_timer
 import logging
-from datetime import datetime
-from multiprocessing import Process
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global state to track scraping progress
-scraping_state = {
-    "is_running": False,
-    "rows_scraped": 0,
+# Set SWR32_QUERY_URL to crawl a stand-in such as benchmarks/replay_server.py instead of the RRC site
+SWR32_QUERY_URL = os.getenv("SWR32_QUERY_URL", "https://webapps.rrc.state.tx.us/swr32/publicquery.xhtml")
+
+# Pages buffered between the browser contexts and the database writer, per context
+PAGES_IN_FLIGHT_PER_WORKER = 2
+
+# How many adaptive timeouts a page transition may run through before failing
+TRANSITION_ATTEMPTS = 3
+
+# Per-page progress is logged at DEBUG; every this many pages it is also logged at INFO
+PROGRESS_LOG_EVERY = 50
+
+# Finds the PrimeFaces paginator of the results table and, unless pageIndex is
+# null, jumps it straight to that 0-based page. Returns whether it was found.
+_SET_PAGE_JS = """
+([tableId, pageIndex]) => {
+    if (!window.PrimeFaces) return false;
+    for (const key in PrimeFaces.widgets) {
+        const widget = PrimeFaces.widgets[key];
+        if (widget && widget.id === tableId && widget.paginator) {
+            if (pageIndex !== null) widget.paginator.setPage(pageIndex);
+            return true;
+        }
+    }
+    return false;
 }
+"""
 
-async def save_flare_data(db, flare_data):
-    """Save flare data to the database using the provided session."""
-    try:
-        logger.info(f"Saving flare data: {flare_data}")
-
-        # Check if location already exists
-        location = db.query(Location).filter(Location.name == flare_data["fv_district"]).first()
-        if not location:
-            location = Location(name=flare_data["fv_district"], coordinates="0,0")
-            db.add(location)
-            db.commit()  # Commit the location immediately
-
-        # Check if operator already exists
-        operator = db.query(Operator).filter(Operator.name == flare_data["operator_name"]).first()
-        if not operator:
-            operator = Operator(name=flare_data["operator_name"])
-            db.add(operator)
-            db.commit()  # Commit the operator immediately
-
-        # Create flare entry
-        flare = Flare(
-            exception_number=flare_data["exception_number"],
-            submittal_date=datetime.strptime(flare_data["submittal_date"], "%m/%d/%Y"),
-            filing_number=flare_data["filing_number"],
-            status=flare_data["status"],
-            filing_type=flare_data["filing_type"],
-            operator_number=flare_data["operator_number"],
-            operator_name=flare_data["operator_name"],
-            property=flare_data["property"],
-            effective_date=datetime.strptime(flare_data["effective_date"], "%m/%d/%Y") if flare_data["effective_date"] else None,
-            expiration_date=datetime.strptime(flare_data["expiration_date"], "%m/%d/%Y") if flare_data["expiration_date"] else None,
-            fv_district=flare_data["fv_district"],
-            location_id=location.id,
-            operator_id=operator.id,
+# Identifies the page currently rendered: the paginator's "(n of N)" label
+# plus the exception number in the first row
+_TABLE_MARKER_EXPR = """(() => {
+    const current = document.querySelector(".ui-paginator-current");
+    const table = document.getElementById("pbqueryForm:pQueryTable");
+    const cell = table && table.querySelector("tr.ui-widget-content td:nth-child(2)");
+    return (current ? current.textContent : "") + "|" + (cell ? cell.textContent.trim() : "");
+})()"""
+
+_TABLE_MARKER_JS = f"() => {_TABLE_MARKER_EXPR}"
+
+# True once no PrimeFaces AJAX request is pending and the table shows another page
+_TABLE_CHANGED_JS = f"""
+(marker) => {{
+    const pf = window.PrimeFaces;
+    if (pf && pf.ajax && pf.ajax.Queue && !pf.ajax.Queue.isEmpty()) return false;
+    return {_TABLE_MARKER_EXPR} !== marker;
+}}
+"""
+
+async def _transition(page, action, limiter):
+    """Run an action that re-renders the results table and wait until it has.
+
+    Instead of sleeping a fixed time, this waits for the rendered page marker
+    to change once PrimeFaces has no AJAX request in flight. The wait timeout
+    follows the latency observed by the shared limiter, and each timeout
+    makes the limiter back off before the wait is extended.
+    """
+    loop = asyncio.get_running_loop()
+    marker = await page.evaluate(_TABLE_MARKER_JS)
+    await limiter.wait()
+    started = loop.time()
+    with stage_timer("navigate"):
+        await action()
+
+    with stage_timer("wait"):
+        for attempt in range(TRANSITION_ATTEMPTS):
+            timeout = limiter.timeout
+            try:
+                await page.wait_for_function(_TABLE_CHANGED_JS, arg=marker, timeout=timeout * 1000)
+                break
+            except PlaywrightTimeoutError:
+                limiter.penalize()
+                logger.warning(f"Results table did not change within {timeout:.0f}s (attempt {attempt + 1}).")
+        else:
+            raise TimeoutError("Results table did not change after paginating.")
+    limiter.observe(loop.time() - started)
+
+async def _open_results(browser, limiter):
+    """Open the SWR-32 query in a fresh browser context and run the search."""
+    context = await browser.new_context()
+    page = await context.new_page()
+    rows_per_page = await _run_search(page, limiter)
+    return context, page, rows_per_page
+
+async def _run_search(page, limiter):
+    """Load the query page, run the default search and return the rows per results page."""
+    # Navigate to the SWR-32 Public Query page
+    await limiter.wait()
+    with stage_timer("navigate"):
+        await page.goto(SWR32_QUERY_URL)
+
+    # Wait for the search button, then run the default query and wait for its results
+    await page.wait_for_selector("#pbqueryForm\\:searchExceptions", state="visible")
+    await _transition(page, lambda: page.click("#pbqueryForm\\:searchExceptions"), limiter)
+    return await _maximize_rows_per_page(page, limiter)
+
+async def _maximize_rows_per_page(page, limiter):
+    """Switch the paginator to its largest rows-per-page option and return that size.
+
+    Returns None when the table has no rows-per-page selector.
+    """
+    selector = page.locator("select.ui-paginator-rpp-options").first
+    if await selector.count() == 0:
+        return None
+    options = await selector.evaluate("(s) => Array.from(s.options).map((o) => o.value)")
+    sizes = [int(value) for value in options if value.isdigit()]
+    if not sizes:
+        return None
+
+    largest = max(sizes)
+    if int(await selector.input_value()) != largest:
+        await _transition(page, lambda: selector.select_option(str(largest)), limiter)
+    return largest
+
+async def _total_pages(page):
+    """Read the page count from the paginator's "(1 of N)" label, or None if it is missing."""
+    current = page.locator(".ui-paginator-current").first
+    if await current.count() == 0:
+        return None
+    match = re.search(r"of\s+([\d,]+)", await current.inner_text())
+    return int(match.group(1).replace(",", "")) if match else None
+
+async def _goto_page(page, page_number, limiter):
+    """Move the results table to a 1-based page number without reading the pages before it."""
+    if await page.evaluate(_SET_PAGE_JS, ["pbqueryForm:pQueryTable", None]):
+        await _transition(
+            page, lambda: page.evaluate(_SET_PAGE_JS, ["pbqueryForm:pQueryTable", page_number - 1]), limiter
         )
-        db.add(flare)
-        db.commit()  # Commit the flare immediately
-        logger.info(f"Created new flare: {flare.id}")
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error saving data to database: {e}")
-        raise
+        return
+
+    # Fall back to stepping through the paginator
+    logger.info("Paginator widget not found, stepping to the requested page.")
+    next_button = page.locator("a.ui-paginator-next:not(.ui-state-disabled)").first
+    for _ in range(page_number - 1):
+        await _transition(page, next_button.click, limiter)
+
+async def _read_page_rows(page):
+    """Extract the flare rows of the page currently shown in the results table."""
+    html = await page.inner_html("#pbqueryForm\\:pQueryTable")
+
+    # Parse in a worker thread so the other browser contexts keep running
+    with stage_timer("parse"):
+        return await asyncio.to_thread(parse_rows, html)
+
+async def _crawl_range(page, first_page, last_page, queue, limiter, crawl):
+    """Read pages first_page..last_page (None for "until the end") into the writer queue."""
+    page_number = first_page
+    if page_number > 1:
+        logger.info(f"Jumping to page {page_number}...")
+        await _goto_page(page, page_number, limiter)
 
-async def _scrape_trrc(scraping_state):
+    while not crawl["stop"].is_set():
+        page_rows = await _read_page_rows(page)
+        logger.debug(f"Found {len(page_rows)} rows on page {page_number}.")
+        await queue.put((page_number, page_rows))
+        if not page_rows:
+            break  # Past the last page
+
+        if last_page is not None and page_number >= last_page:
+            break
+
+        # Check if there is a next page
+        next_button = page.locator("a.ui-paginator-next:not(.ui-state-disabled)").first  # Use .first to select the top "Next" button
+        if await next_button.count() == 0:
+            break  # No more pages
+
+        # Click the "Next" button and wait for the next page to render
+        await _transition(page, next_button.click, limiter)
+        page_number += 1
+
+async def _crawl_range_http(pager, first_page, last_page, queue, limiter, crawl):
+    """Fetch pages first_page..last_page (None for "until the end") over HTTP into the writer queue."""
+    loop = asyncio.get_running_loop()
+    pages = itertools.count(first_page) if last_page is None else range(first_page, last_page + 1)
+    for page_number in pages:
+        if crawl["stop"].is_set():
+            break
+        await limiter.wait()
+        started = loop.time()
+        with stage_timer("fetch"):
+            html = await pager.fetch_page_html(page_number)
+        limiter.observe(loop.time() - started)
+
+        with stage_timer("parse"):
+            page_rows = await asyncio.to_thread(parse_rows, html)
+        await queue.put((page_number, page_rows))
+        if not page_rows:
+            break  # Past the last page
+
+async def _write_pages(db, run, queue, crawl, dimensions):
+    """Single consumer that commits pages and advances the run checkpoint.
+
+    Pages can arrive out of order from parallel contexts, so the checkpoint
+    only moves over the contiguous prefix of committed pages. Once the crawl
+    has to stop, remaining pages are drained without writing them so that no
+    producer stays blocked on a full queue.
+    """
+    committed = set()
+    unchanged = set()
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        if crawl["stop"].is_set():
+            continue
+
+        page_number, page_rows = item
+        if await asyncio.to_thread(cancel_requested, db, run):  # Don't write a page if scraping was stopped
+            logger.info("Scraping stopped. Discarding the remaining pages.")
+            crawl["status"] = "stopped"
+            crawl["stop"].set()
+            continue
+
+        # Save the page to the database with a single commit, off the event loop
+        with stage_timer("write"):
+            written = await asyncio.to_thread(save_flare_page, db, page_rows, dimensions)
+        SCRAPE_PAGES.inc()
+        SCRAPE_ROWS_WRITTEN.inc(written)
+        log_level = logging.INFO if page_number % PROGRESS_LOG_EVERY == 0 else logging.DEBUG
+        logger.log(log_level, f"Committed {written} new or changed flares for page {page_number}.")
+
+        committed.add(page_number)
+        checkpoint = run.last_page
+        while checkpoint + 1 in committed:
+            checkpoint += 1
+            committed.discard(checkpoint)
+        await asyncio.to_thread(record_page, db, run, checkpoint, len(page_rows))
+
+        # An unchanged page only ends an incremental crawl once every page before it is committed:
+        # with several slices, a deep page can arrive while newer pages are still on their way
+        if run.incremental and page_rows and written == 0:
+            unchanged.add(page_number)
+        if any(unchanged_page <= checkpoint for unchanged_page in unchanged):
+            logger.info("Reached a page of only known, unchanged filings. Stopping incremental scrape.")
+            crawl["stop"].set()
+
+async def scrape_run(run_id):
+    """Crawl the SWR-32 results for a queued scrape_runs row and upsert every page.
+
+    The run row carries the crawl options and is the only channel to the
+    API: the checkpoint doubles as progress, and cancel_requested is polled
+    before each page is written.
+
+    The paginator is switched to its largest rows-per-page option, and the
+    remaining page range is split into `workers` contiguous slices. In
+    "browser" mode each slice is read by its own browser context. In "http"
+    mode the first context only bootstraps the JSF view state, and every
+    slice replays the datatable's partial-request POST through one pooled
+    HTTP client. If that replay fails, the crawl falls back to the browser.
+    Every request across all slices goes through one rate limiter, and pages
+    are committed by a single writer fed through a bounded queue.
+
+    Progress is checkpointed after each committed page, so a resumed run
+    continues from the page after its checkpoint instead of page 1.
+
+    In incremental mode the crawl stops at the first full page whose filings
+    are all already stored and unchanged. The query lists the newest filings
+    first, so everything past that page has been seen by an earlier run.
+    """
     db = SessionLocal()  # Create a single database session for the entire process
     browser = None
+    run = db.get(ScrapeRun, run_id)
+    options = run.options or {}
+    workers = options.get("workers", 1)
+    fetch_mode = options.get("fetch_mode", "browser")
+    mark_running(db, run)
+    crawl = {"status": "completed", "stop": asyncio.Event()}
+    dimensions = DimensionCache()
     try:
-        logger.info("Starting scraping process...")
+        logger.info(f"Starting scraping process (run {run.id})...")
+        dimensions.warm(db)  # Every known operator and location, so pages only look up new ones
+        ensure_year_partitions(db)  # New filings land in their year's partition, not the default one
         async with async_playwright() as p:
             # Launch a browser
             browser = await p.chromium.launch(headless=True)  # Set headless=False for debugging
-            page = await browser.new_page()
-
-            # Navigate to the SWR-32 Public Query page
-            logger.info("Navigating to the SWR-32 Public Query page...")
-            await page.goto("https://webapps.rrc.state.tx.us/swr32/publicquery.xhtml")
-            logger.info("Page loaded.")
-
-            # Wait for the search button to be visible
-            logger.info("Waiting for the search button to be visible...")
-            await page.wait_for_selector("#pbqueryForm\\:searchExceptions", state="visible")
-            logger.info("Search button is visible.")
-
-            # Click the search button
-            logger.info("Clicking the search button...")
-            await page.click("#pbqueryForm\\:searchExceptions")
-            logger.info("Search button clicked.")
-
-            # Wait for the results to load
-            logger.info("Waiting for results to load...")
-            await page.wait_for_selector("#pbqueryForm\\:pQueryTable", timeout=30000)  # Increase timeout if needed
-            logger.info("Results loaded.")
-
-            while scraping_state["is_running"]:  # Use scraping_state to control the loop
-                # Add a delay to ensure the results are fully loaded
-                await asyncio.sleep(2)  # Adjust the delay as needed
-
-                # Extract the HTML content of the results table
-                html = await page.inner_html("#pbqueryForm\\:pQueryTable")
-                logger.info("HTML content of the results table extracted.")
-
-                # Parse the HTML using BeautifulSoup
-                soup = BeautifulSoup(html, "html.parser")
-                rows = soup.select("tr.ui-widget-content")
-                logger.info(f"Found {len(rows)} rows on this page.")
-
-                # Process and save data for the current page
-                for row in rows:
-                    if not scraping_state["is_running"]:  # Stop processing rows if scraping is stopped
-                        logger.info("Scraping stopped. Exiting row processing loop.")
-                        break
-
-                    columns = row.find_all("td")
-                    if len(columns) >= 11:  # Ensure the row has enough columns
-                        flare_data = {
-                            "exception_number": columns[1].text.strip(),
-                            "submittal_date": columns[2].text.strip(),
-                            "filing_number": columns[3].text.strip(),
-                            "status": columns[4].text.strip(),
-                            "filing_type": columns[5].text.strip(),
-                            "operator_number": columns[6].text.strip(),
-                            "operator_name": columns[7].text.strip(),
-                            "property": columns[8].text.strip(),
-                            "effective_date": columns[9].text.strip(),
-                            "expiration_date": columns[10].text.strip(),
-                            "fv_district": columns[11].text.strip(),
-                        }
-                        await save_flare_data(db, flare_data)  # Save data to the database in real-time
-                        scraping_state["rows_scraped"] += 1  # Update the number of rows scraped
-
-                # Commit changes after processing each page
-                db.commit()
-                logger.info("Committed changes to the database for this page.")
-
-                # Check if there is a next page
-                next_button = page.locator("a.ui-paginator-next:not(.ui-state-disabled)").first  # Use .first to select the top "Next" button
-                if await next_button.count() == 0:
-                    break  # No more pages
-
-                # Click the "Next" button
-                logger.info("Navigating to the next page...")
-                await next_button.click()
-
-                # Wait for the results to load on the next page
-                await page.wait_for_selector("#pbqueryForm\\:pQueryTable", timeout=30000)
-                logger.info("Next page loaded.")
+            limiter = RateLimiter(options.get("requests_per_second", 1.0))
+
+            # The first context also discovers the page size and how many pages there are
+            context, page, rows_per_page = await _open_results(browser, limiter)
+            total_pages = await _total_pages(page)
+            set_page_size(db, run, rows_per_page)
+            first_page = run.last_page + 1
+            logger.info(f"Results loaded, {total_pages or 'unknown number of'} pages of {rows_per_page or 'default'} rows.")
+
+            pager = None
+            if fetch_mode == "http" and total_pages is not None and rows_per_page:
+                try:
+                    pager = await AjaxPager.from_page(page, rows_per_page)
+                    await pager.fetch_page_html(first_page)
+                except Exception as e:
+                    logger.warning(f"HTTP fetch mode unavailable ({e}), falling back to the browser.")
+                    if pager is not None:
+                        await pager.close()
+                    pager = None
+
+            # Split the remaining pages into one contiguous slice per context
+            if total_pages is None or workers <= 1:
+                ranges = [(first_page, None)]
+            else:
+                remaining = max(total_pages - first_page + 1, 1)
+                size = -(-remaining // workers)
+                ranges = [
+                    (start, min(start + size - 1, total_pages))
+                    for start in range(first_page, first_page + remaining, size)
+                ]
+
+            queue = asyncio.Queue(maxsize=PAGES_IN_FLIGHT_PER_WORKER * len(ranges))
+
+            async def crawl_slice(index, first, last):
+                if pager is not None:
+                    await _crawl_range_http(pager, first, last, queue, limiter, crawl)
+                    return
+                if index == 0:
+                    await _crawl_range(page, first, last, queue, limiter, crawl)
+                    return
+                slice_context, slice_page, _ = await _open_results(browser, limiter)
+                try:
+                    await _crawl_range(slice_page, first, last, queue, limiter, crawl)
+                finally:
+                    await slice_context.close()
+
+            async def crawl_all():
+                slices = [asyncio.create_task(crawl_slice(i, first, last)) for i, (first, last) in enumerate(ranges)]
+                try:
+                    await asyncio.gather(*slices)
+                finally:
+                    # One slice failing leaves its siblings running; stop them before the browser closes
+                    for task in slices:
+                        task.cancel()
+                    await asyncio.gather(*slices, return_exceptions=True)
+                await queue.put(None)
+
+            producer = asyncio.create_task(crawl_all())
+            writer = asyncio.create_task(_write_pages(db, run, queue, crawl, dimensions))
+            try:
+                done, _ = await asyncio.wait({producer, writer}, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    task.result()  # Re-raise the first failure
+            finally:
+                for task in (producer, writer):
+                    task.cancel()
+                await asyncio.gather(producer, writer, return_exceptions=True)
+                if pager is not None:
+                    await pager.close()
+                await context.close()
 
     except Exception as e:
         logger.error(f"Error during scraping: {e}")
         db.rollback()  # Rollback changes in case of an error
+        finish_run(db, run, "failed", error=str(e))
         raise
+    else:
+        finish_run(db, run, crawl["status"])
     finally:
         # Ensure the browser is closed even if an error occurs
         if browser:
@@ -157,18 +375,4 @@ async def _scrape_trrc(scraping_state):
             logger.info("Browser closed.")
 
         db.close()  # Close the database session
-        scraping_state["is_running"] = False  # Mark scraping as stopped
         logger.info("Scraping process completed.")
-
-def scrape_trrc(scraping_state):
-    """Run the scraper in a separate process."""
-    process = Process(target=_run_scraper, args=(scraping_state,))  # Pass scraping_state
-    process.start()
-    process.join()
-
-def _run_scraper(scraping_state):
-    """Create a new event loop for the subprocess and run the scraper."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(_scrape_trrc(scraping_state))  # Pass scraping_state
-    loop.close()
@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+
+class LocationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class OperatorOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    operator_number: Optional[str] = None
+    name: Optional[str] = None
+
+
+class FlareOut(BaseModel):
+    """A flare as stored, with its operator and district only as ids."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    exception_number: Optional[str] = None
+    submittal_date: Optional[datetime] = None
+    filing_number: Optional[str] = None
+    status: Optional[str] = None
+    filing_type: Optional[str] = None
+    property: Optional[str] = None
+    effective_date: Optional[datetime] = None
+    expiration_date: Optional[datetime] = None
+    location_id: Optional[int] = None
+    operator_id: Optional[int] = None
+    volume: Optional[float] = None
+    duration: Optional[float] = None
+    h2s: Optional[float] = None
+    date: Optional[datetime] = None
+
+
+class FlareRowOut(FlareOut):
+    """A flare joined with its location and operator, as listed by /api/v1/flares/."""
+
+    operator_number: Optional[str] = None
+    operator_name: Optional[str] = None
+    fv_district: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location: str = "Unknown"
+    operator: str = "Unknown"
+
+
+class FlareColumnsOut(BaseModel):
+    """The same page as a list of FlareRowOut, with one array per field (?layout=columns)."""
+
+    id: List[int]
+    exception_number: List[Optional[str]]
+    submittal_date: List[Optional[datetime]]
+    filing_number: List[Optional[str]]
+    status: List[Optional[str]]
+    filing_type: List[Optional[str]]
+    operator_number: List[Optional[str]]
+    operator_name: List[Optional[str]]
+    property: List[Optional[str]]
+    effective_date: List[Optional[datetime]]
+    expiration_date: List[Optional[datetime]]
+    fv_district: List[Optional[str]]
+    location_id: List[Optional[int]]
+    operator_id: List[Optional[int]]
+    volume: List[Optional[float]]
+    duration: List[Optional[float]]
+    h2s: List[Optional[float]]
+    date: List[Optional[datetime]]
+    latitude: List[Optional[float]]
+    longitude: List[Optional[float]]
+    location: List[str]
+    operator: List[str]
+
+
+class FlareIn(BaseModel):
+    """One filing in a bulk upload, with the columns of an SWR-32 export."""
+
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
+    exception_number: str
+    filing_number: str
+    submittal_date: Optional[datetime] = None
+    status: Optional[str] = None
+    filing_type: Optional[str] = None
+    operator_number: Optional[str] = None
+    operator_name: Optional[str] = None
+    property: Optional[str] = None
+    effective_date: Optional[datetime] = None
+    expiration_date: Optional[datetime] = None
+    fv_district: Optional[str] = None
+
+    @field_validator("exception_number", "filing_number")
+    @classmethod
+    def _not_blank(cls, value):
+        if not value:
+            raise ValueError("must not be blank")
+        return value
+
+    @field_validator("submittal_date", "effective_date", "expiration_date", mode="before")
+    @classmethod
+    def _parse_date(cls, value):
+        """Accept ISO 8601 as well as the MM/DD/YYYY dates of the SWR-32 site."""
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                return None
+            if "/" in value:
+                return datetime.strptime(value, "%m/%d/%Y")
+        return value
+
+    @field_validator("submittal_date", "effective_date", "expiration_date")
+    @classmethod
+    def _naive_utc(cls, value):
+        """Flare dates are stored without a time zone, as UTC."""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
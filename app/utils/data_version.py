@@ -0,0 +1,36 @@
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from app.models.data_version import DataVersion
+
+# Seconds a process trusts the data version it last read
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+
+_DATA_VERSION_ID = 1
+
+# (version, monotonic time it was read) of the last read in this process
+_cached_version = None
+
+
+def bump_data_version(db):
+    """Advance the data version inside the caller's transaction."""
+    result = db.execute(
+        update(DataVersion)
+        .where(DataVersion.id == _DATA_VERSION_ID)
+        .values(version=DataVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.execute(insert(DataVersion).values(id=_DATA_VERSION_ID, version=1, updated_at=datetime.utcnow()))
+
+
+async def current_data_version(db):
+    """Return the data version, querying the database at most once per DATA_VERSION_TTL."""
+    global _cached_version
+    now = time.monotonic()
+    if _cached_version is None or now - _cached_version[1] >= DATA_VERSION_TTL:
+        version = await db.scalar(select(DataVersion.version).where(DataVersion.id == _DATA_VERSION_ID))
+        _cached_version = (version or 0, now)
+    return _cached_version[0]
@@ -0,0 +1,248 @@
+import csv
+import logging
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.models.flare import Flare
+from app.models.location import Location
+from app.models.operator import Operator
+from app.scarpers.districts import district_coordinates
+from app.scarpers.flare_writer import FILING_KEY, on_conflict_update_changed, save_flare_page
+from app.schemas.flare import FlareIn
+from app.utils.data_version import bump_data_version
+from app.utils.flare_stats import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and loaded per transaction
+BULK_BATCH_SIZE = 5000
+
+# Rejected rows reported back in full; the rest are only counted
+MAX_REPORTED_REJECTS = 100
+
+# Columns of a bulk upload, in CSV header / COPY order
+BULK_FIELDS = tuple(FlareIn.model_fields)
+
+# Bulk columns that hold dates rather than text
+_DATE_FIELDS = ("submittal_date", "effective_date", "expiration_date")
+
+# Bulk columns that live on the operators and locations tables rather than flares
+_DIMENSION_FIELDS = ("operator_number", "operator_name", "fv_district")
+
+# Per-connection staging table the COPY lands in; emptied at every commit
+_staging = Table(
+    "flare_bulk_staging",
+    MetaData(),
+    *(
+        Column(name, DateTime if name in _DATE_FIELDS else String)
+        for name in BULK_FIELDS
+    ),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+
+
+async def _lines(chunks):
+    """Split a stream of byte chunks into text lines, without holding more than one line in memory."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_records(chunks, format):
+    """Yield (line number, dict) for each non-blank record of an NDJSON or CSV body.
+
+    CSV bodies start with a header line naming the columns. Values may be
+    quoted, but may not contain line breaks. Records that cannot be decoded
+    are yielded as (line number, error message).
+    """
+    header = None
+    line_number = 0
+    async for line in _lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        if format == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, f"expected {len(header)} values, got {len(values)}"
+                continue
+            yield line_number, dict(zip(header, values))
+        else:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield line_number, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, "expected a JSON object"
+                continue
+            yield line_number, record
+
+
+def validate_record(line_number, record, rejects):
+    """Return the record as a FlareIn, or None after noting why it was rejected."""
+    if isinstance(record, str):
+        rejects.append({"line": line_number, "error": record})
+        return None
+    try:
+        return FlareIn.model_validate(record)
+    except ValidationError as e:
+        error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        rejects.append({"line": line_number, "error": error})
+        return None
+
+
+def _dedupe(rows):
+    """Keep the last row per filing: one upsert cannot touch the same flare twice."""
+    return list({tuple(getattr(row, column) for column in FILING_KEY): row for row in rows}.values())
+
+
+def _refresh_derived(db, flare_values):
+    refresh_rollups(db, flare_values)
+    bump_data_version(db)
+
+
+async def _copy_batch(db, rows):
+    """COPY a batch into the staging table, then merge it into flares with one upsert (Postgres)."""
+    await db.execute(CreateTable(_staging, if_not_exists=True))
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        _staging.name,
+        records=[tuple(getattr(row, name) for name in BULK_FIELDS) for row in rows],
+        columns=list(BULK_FIELDS),
+    )
+
+    # New operators and districts first, so the merge can join every row to its ids
+    await db.execute(
+        postgresql.insert(Operator)
+        .from_select(
+            ["operator_number", "name"],
+            select(_staging.c.operator_number, func.max(_staging.c.operator_name))
+            .where(_staging.c.operator_number.is_not(None))
+            .group_by(_staging.c.operator_number),
+        )
+        .on_conflict_do_nothing(index_elements=["operator_number"])
+    )
+    districts = {row.fv_district for row in rows if row.fv_district is not None}
+    if districts:
+        await db.execute(
+            postgresql.insert(Location).on_conflict_do_nothing(index_elements=["name"]),
+            [
+                {"name": name, "latitude": latitude, "longitude": longitude}
+                for name in districts
+                for latitude, longitude in [district_coordinates(name)]
+            ],
+        )
+
+    # Dates of the staged filings as stored before the merge, so the months they leave are recounted
+    same_filing = (
+        Flare.exception_number == _staging.c.exception_number,
+        Flare.filing_number == _staging.c.filing_number,
+    )
+    stored = (await db.execute(select(Flare.submittal_date, Flare.effective_date).where(*same_filing))).all()
+
+    # Filings whose submittal date moved are deleted here and inserted again by the merge
+    await db.execute(
+        delete(Flare).where(*same_filing, Flare.submittal_date.is_distinct_from(_staging.c.submittal_date))
+    )
+
+    flare_columns = [name for name in BULK_FIELDS if name not in _DIMENSION_FIELDS]
+    merge = postgresql.insert(Flare).from_select(
+        flare_columns + ["location_id", "operator_id"],
+        select(*(_staging.c[name] for name in flare_columns), Location.id, Operator.id)
+        .select_from(_staging)
+        .outerjoin(Location, Location.name == _staging.c.fv_district)
+        .outerjoin(Operator, Operator.operator_number == _staging.c.operator_number),
+    )
+    written = len((await db.execute(on_conflict_update_changed(merge))).all())
+    if written:
+        await db.run_sync(_refresh_derived, [row.model_dump() for row in rows] + [row._asdict() for row in stored])
+    await db.commit()
+    return written
+
+
+async def load_batch(db, rows):
+    """Write a batch of validated rows in one transaction and return how many flares were new or changed.
+
+    Postgres batches go through COPY and a single merge statement; other
+    databases take the scraper's page writer.
+    """
+    rows = _dedupe(rows)
+    if not rows:
+        return 0
+    try:
+        if db.bind.dialect.name == "postgresql":
+            return await _copy_batch(db, rows)
+        return await db.run_sync(save_flare_page, rows)
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def bulk_ingest(db, chunks, format):
+    """Validate and load an NDJSON or CSV body batch by batch, returning per-batch counts and rejects.
+
+    Each batch commits on its own. If one fails to load, the upload stops
+    there: the batch is reported with its error and failed_batch holds its
+    index, while the batches before it stay committed. The rest of the body
+    is not read.
+    """
+    batches, rejects = [], []
+    batch, batch_lines, batch_rejects = [], 0, 0
+
+    async def flush():
+        index = len(batches)
+        summary = {"rows": batch_lines, "loaded": len(batch), "written": 0, "rejected": batch_rejects}
+        batches.append(summary)
+        try:
+            summary["written"] = await load_batch(db, batch)
+        except Exception as e:
+            logger.error(f"Bulk batch {index} failed, {index} earlier batches committed: {e}")
+            summary["loaded"] = 0
+            summary["error"] = str(e)
+            return False
+        logger.debug(f"Bulk batch {index}: {len(batch)} rows loaded, {summary['written']} new or changed")
+        return True
+
+    failed = False
+    async for line_number, record in iter_records(chunks, format):
+        batch_lines += 1
+        row_rejects = []
+        row = validate_record(line_number, record, row_rejects)
+        if row is None:
+            batch_rejects += 1
+            if len(rejects) < MAX_REPORTED_REJECTS:
+                rejects.extend(row_rejects)
+            continue
+        batch.append(row)
+        if len(batch) >= BULK_BATCH_SIZE:
+            failed = not await flush()
+            batch, batch_lines, batch_rejects = [], 0, 0
+            if failed:
+                break
+    if batch_lines and not failed:
+        failed = not await flush()
+
+    return {
+        "rows": sum(b["rows"] for b in batches),
+        "loaded": sum(b["loaded"] for b in batches),
+        "written": sum(b["written"] for b in batches),
+        "rejected": sum(b["rejected"] for b in batches),
+        "failed_batch": len(batches) - 1 if failed else None,
+        "batches": batches,
+        "rejects": rejects,
+    }
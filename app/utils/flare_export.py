@@ -0,0 +1,50 @@
+import csv
+import io
+from datetime import datetime
+
+import orjson
+
+from app.utils.database import AsyncSessionLocal
+from app.utils.flare_queries import FLARE_ROW_FIELDS
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_BATCH_SIZE = 2000
+
+# Column order of the CSV export, matching the list endpoint's fields
+EXPORT_FIELDS = list(FLARE_ROW_FIELDS)
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _stream_batches(stmt):
+    """Yield lists of result rows from a server-side cursor on a dedicated session.
+
+    The session is owned by the generator rather than the request dependency
+    because the response body is produced after the endpoint has returned.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for batch in result.partitions():
+            yield batch
+
+
+async def iter_flares_ndjson(stmt):
+    """Stream the rows of a flare_rows_select statement as newline-delimited JSON."""
+    async for batch in _stream_batches(stmt):
+        yield b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+async def iter_flares_csv(stmt):
+    """Stream the rows of a flare_rows_select statement as CSV with a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+
+    async for batch in _stream_batches(stmt):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
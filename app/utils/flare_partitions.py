@@ -0,0 +1,62 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Yearly partitions kept ready beyond the current year, so new filings never land in the default one
+PARTITION_YEARS_AHEAD = 1
+
+# Catches undated filings and any year without a partition of its own
+DEFAULT_PARTITION = "flares_default"
+
+
+def partition_name(year):
+    return f"flares_y{year}"
+
+
+def year_bounds(year):
+    """[start, end) submittal dates of a yearly partition."""
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+
+def ensure_year_partitions(db, through_year=None):
+    """Create the yearly flares partitions missing up to `through_year`, and commit. Postgres only.
+
+    Rows the default partition already holds for a new year are moved into
+    it in the same transaction, since Postgres refuses to attach a partition
+    whose range overlaps rows in the default one. Returns the names of the
+    partitions created.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+    current_year = datetime.utcnow().year
+    through_year = through_year or current_year + PARTITION_YEARS_AHEAD
+    existing = set(
+        db.scalars(
+            text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'flares'::regclass")
+        )
+    )
+
+    created = []
+    for year in range(current_year, through_year + 1):
+        name = partition_name(year)
+        if name in existing:
+            continue
+        start, end = year_bounds(year)
+        bounds = {"start": start, "end": end}
+        db.execute(text(f"CREATE TABLE {name} (LIKE flares INCLUDING DEFAULTS)"))
+        db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE submittal_date >= :start AND submittal_date < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        db.execute(text(f"ALTER TABLE flares ATTACH PARTITION {name} FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"))
+        created.append(name)
+    db.commit()
+    if created:
+        logger.info(f"Created flares partitions: {', '.join(created)}")
+    return created
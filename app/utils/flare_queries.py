@@ -0,0 +1,247 @@
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_, union_all
+from sqlalchemy.orm import aliased
+
+from app.models.flare import Flare
+from app.models.location import Location
+from app.models.operator import Operator
+
+# Page size limits for the list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Mean Earth radius used for the radius filter
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode_cursor(submittal_date: Optional[datetime], flare_id: int) -> str:
+    """Encode the (submittal_date, id) position of the last row on a page."""
+    payload = json.dumps([submittal_date.isoformat() if submittal_date else None, flare_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submittal_date, flare_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(submittal_date) if submittal_date else None), int(flare_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+# Columns fetched for API responses: one joined, column-only query per page
+FLARE_ROW_COLUMNS = (
+    Flare.id,
+    Flare.exception_number,
+    Flare.submittal_date,
+    Flare.filing_number,
+    Flare.status,
+    Flare.filing_type,
+    Operator.operator_number,
+    Operator.name.label("operator_name"),
+    Flare.property,
+    Flare.effective_date,
+    Flare.expiration_date,
+    Location.name.label("fv_district"),
+    Flare.location_id,
+    Flare.operator_id,
+    Flare.volume,
+    Flare.duration,
+    Flare.h2s,
+    Flare.date,
+    Location.latitude,
+    Location.longitude,
+    func.coalesce(Location.name, "Unknown").label("location"),
+    func.coalesce(Operator.name, "Unknown").label("operator"),
+)
+
+# Field names of the rows returned by flare_rows_select, in column order
+FLARE_ROW_FIELDS = tuple(column.key for column in FLARE_ROW_COLUMNS)
+
+
+def flare_rows_select():
+    """Select flare columns with their location and operator in a single round-trip."""
+    return (
+        select(*FLARE_ROW_COLUMNS)
+        .outerjoin(Location, Flare.location_id == Location.id)
+        .outerjoin(Operator, Flare.operator_id == Operator.id)
+    )
+
+
+def serialize_flare_row(row):
+    """Build the API dict for one row returned by flare_rows_select.
+
+    Dates stay datetimes; orjson writes them in ISO 8601 without a Python
+    round-trip through isoformat().
+    """
+    return row._asdict()
+
+
+def flare_rows_as_columns(rows):
+    """Transpose flare_rows_select rows into one list per field (the ?layout=columns shape)."""
+    columns = zip(*rows) if rows else ((),) * len(FLARE_ROW_FIELDS)
+    return dict(zip(FLARE_ROW_FIELDS, map(list, columns)))
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse "min_lon,min_lat,max_lon,max_lat". Raises ValueError if it is malformed."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    except Exception as e:
+        raise ValueError(f"Invalid bbox: {bbox}") from e
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError(f"Invalid bbox: {bbox}")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_point(point: str) -> Tuple[float, float]:
+    """Parse "lat,lon". Raises ValueError if it is malformed."""
+    try:
+        latitude, longitude = (float(part) for part in point.split(","))
+    except Exception as e:
+        raise ValueError(f"Invalid point: {point}") from e
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"Invalid point: {point}")
+    return latitude, longitude
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Bounding box (min_lon, min_lat, max_lon, max_lat) that contains the circle around a point."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    dlon = 180.0 if cos_lat < 1e-9 else min(180.0, dlat / cos_lat)
+    return longitude - dlon, max(-90.0, latitude - dlat), longitude + dlon, min(90.0, latitude + dlat)
+
+
+def locations_in_bbox(bbox: Tuple[float, float, float, float], *columns):
+    """Select location columns (default: id) inside a bounding box, using the lat/lon index."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return select(*(columns or (Location.id,))).where(
+        Location.latitude.between(min_lat, max_lat),
+        Location.longitude.between(min_lon, max_lon),
+    )
+
+
+def locations_near_query(latitude: float, longitude: float, radius_km: float):
+    """Select (id, latitude, longitude) of the candidate locations for a radius search."""
+    return locations_in_bbox(
+        radius_bbox(latitude, longitude, radius_km), Location.id, Location.latitude, Location.longitude
+    )
+
+
+def within_radius(rows, latitude: float, longitude: float, radius_km: float):
+    """Keep the ids of the locations_near_query rows that are really within the radius."""
+    return [
+        row.id for row in rows if haversine_km(latitude, longitude, row.latitude, row.longitude) <= radius_km
+    ]
+
+
+def apply_flare_filters(
+    stmt,
+    status: Optional[str] = None,
+    filing_type: Optional[str] = None,
+    operator_number: Optional[str] = None,
+    fv_district: Optional[str] = None,
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    expires_from: Optional[datetime] = None,
+    expires_to: Optional[datetime] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    location_ids: Optional[Iterable[int]] = None,
+):
+    """Add the server-side flare filters to a select statement.
+
+    `bbox` keeps flares whose location lies in the box; `location_ids` keeps
+    flares at the given locations, e.g. the result of a radius search.
+    """
+    if status is not None:
+        stmt = stmt.where(Flare.status == status)
+    if filing_type is not None:
+        stmt = stmt.where(Flare.filing_type == filing_type)
+    if operator_number is not None:
+        stmt = stmt.where(Flare.operator_id.in_(select(Operator.id).where(Operator.operator_number == operator_number)))
+    if fv_district is not None:
+        stmt = stmt.where(Flare.location_id.in_(select(Location.id).where(Location.name == fv_district)))
+    if submitted_from is not None:
+        stmt = stmt.where(Flare.submittal_date >= submitted_from)
+    if submitted_to is not None:
+        stmt = stmt.where(Flare.submittal_date < submitted_to)
+    if expires_from is not None:
+        stmt = stmt.where(Flare.expiration_date >= expires_from)
+    if expires_to is not None:
+        stmt = stmt.where(Flare.expiration_date < expires_to)
+    if bbox is not None:
+        stmt = stmt.where(Flare.location_id.in_(locations_in_bbox(bbox)))
+    if location_ids is not None:
+        stmt = stmt.where(Flare.location_id.in_(list(location_ids)))
+    return stmt
+
+
+def apply_keyset_page(stmt, cursor: Optional[str], limit: int):
+    """Order newest first and seek past the cursor instead of using OFFSET.
+
+    Rows are ordered by (submittal_date DESC NULLS LAST, id DESC), the order
+    of the composite indexes on flares, so every page is one index range
+    scan regardless of how deep into the table it is. Dated rows are sought
+    with a row-value comparison; once they run out, the page continues into
+    the undated tail through a second, separately indexed branch.
+    """
+    order = (Flare.submittal_date.desc().nulls_last(), Flare.id.desc())
+    if not cursor:
+        return stmt.order_by(*order).limit(limit)
+
+    last_date, last_id = decode_cursor(cursor)
+    undated = stmt.where(Flare.submittal_date.is_(None))
+    if last_date is None:
+        return undated.where(Flare.id < last_id).order_by(Flare.id.desc()).limit(limit)
+
+    dated = stmt.where(tuple_(Flare.submittal_date, Flare.id) < tuple_(last_date, last_id)).order_by(*order).limit(limit)
+    return _ordered_union(stmt, limit, dated, undated.order_by(Flare.id.desc()).limit(limit))
+
+
+def _ordered_union(base, limit, *branches):
+    """Combine limited branches of `base` into one page, in keyset order.
+
+    Each branch is wrapped in a subquery so it keeps its own ORDER BY and
+    LIMIT on every backend. A select of the Flare entity comes back as Flare
+    objects again.
+    """
+    page = union_all(*(select(*branch.subquery().c) for branch in branches)).subquery("keyset_page")
+    descriptions = base.column_descriptions
+    if len(descriptions) == 1 and descriptions[0]["expr"] is Flare:
+        row = aliased(Flare, page)
+        return select(row).order_by(row.submittal_date.desc().nulls_last(), row.id.desc()).limit(limit)
+    return select(*page.c).order_by(page.c.submittal_date.desc().nulls_last(), page.c.id.desc()).limit(limit)
+
+
+def flare_page_query(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, base=None, **filters):
+    """Build the select for one filtered, keyset-paginated page of flares.
+
+    Defaults to the column-only rows of flare_rows_select; pass `base` to page
+    over another select such as select(Flare).
+    """
+    stmt = apply_flare_filters(flare_rows_select() if base is None else base, **filters)
+    return apply_keyset_page(stmt, cursor, limit)
+
+
+def next_cursor(flares, limit: int) -> Optional[str]:
+    """Return the cursor for the page after `flares`, or None on the last page."""
+    if len(flares) < limit:
+        return None
+    last = flares[-1]
+    return encode_cursor(last.submittal_date, last.id)
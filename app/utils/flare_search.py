@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+
+from sqlalchemy import select
+
+from app.models.flare import Flare
+from app.models.operator import Operator
+from app.utils.data_version import current_data_version
+
+# Results returned per kind of match
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+# Minimum seconds between checks for new names. A crawl moves the data version every page,
+# and each rebuild scans every property name, so the typeahead may lag the crawl this long
+TYPEAHEAD_REFRESH_SECONDS = float(os.getenv("TYPEAHEAD_REFRESH_SECONDS", "300"))
+
+
+def _like_pattern(q):
+    """Escape LIKE wildcards in user input and match it anywhere in the value."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def operators_matching_query(q, limit):
+    """Operators whose name contains q, served by the trigram index on operators.name."""
+    return (
+        select(Operator.id, Operator.name)
+        .where(Operator.name.ilike(_like_pattern(q), escape="\\"))
+        .order_by(Operator.name)
+        .limit(limit)
+    )
+
+
+def properties_matching_query(q, limit):
+    """Distinct property names containing q, served by the trigram index on flares.property."""
+    return (
+        select(Flare.property)
+        .where(Flare.property.ilike(_like_pattern(q), escape="\\"))
+        .group_by(Flare.property)
+        .order_by(Flare.property)
+        .limit(limit)
+    )
+
+
+class PrefixIndex:
+    """Sorted, case-folded names searched by prefix with bisect, for typeahead.
+
+    Entries are (folded name, name, id) tuples; id is None for properties.
+    """
+
+    def __init__(self, entries=()):
+        self.entries = sorted(entries)
+
+    def search(self, prefix, limit):
+        prefix = prefix.casefold()
+        matches = []
+        for folded, name, entry_id in self.entries[bisect_left(self.entries, (prefix,)):]:
+            if not folded.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append({"id": entry_id, "name": name} if entry_id is not None else {"name": name})
+        return matches
+
+
+class TypeaheadIndex:
+    """Prefix indexes over operator and property names, rebuilt when the data version moves.
+
+    The version is checked at most every TYPEAHEAD_REFRESH_SECONDS, so a
+    running crawl costs one rebuild per interval rather than one per page.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.checked_at = None
+        self.operators = PrefixIndex()
+        self.properties = PrefixIndex()
+        self._lock = asyncio.Lock()
+
+    def _fresh(self):
+        return self.checked_at is not None and time.monotonic() - self.checked_at < TYPEAHEAD_REFRESH_SECONDS
+
+    async def _refresh(self, db):
+        if self._fresh():
+            return
+        async with self._lock:
+            if self._fresh():
+                return
+            version = await current_data_version(db)
+            if version != self.version:
+                operators = (await db.execute(select(Operator.name, Operator.id).where(Operator.name.is_not(None)))).all()
+                properties = await db.scalars(select(Flare.property).where(Flare.property.is_not(None)).distinct())
+                self.operators = PrefixIndex((name.casefold(), name, operator_id) for name, operator_id in operators)
+                self.properties = PrefixIndex((name.casefold(), name, None) for name in properties)
+                self.version = version
+            self.checked_at = time.monotonic()
+
+    async def search(self, db, prefix, limit):
+        await self._refresh(db)
+        return {
+            "operators": self.operators.search(prefix, limit),
+            "properties": self.properties.search(prefix, limit),
+        }
+
+
+typeahead_index = TypeaheadIndex()
+
+
+async def search_names(db, q, limit, prefix=False):
+    """Find operators and properties by name: by prefix in memory, or by substring in SQL."""
+    if prefix:
+        return await typeahead_index.search(db, q, limit)
+    operators = (await db.execute(operators_matching_query(q, limit))).all()
+    properties = await db.scalars(properties_matching_query(q, limit))
+    return {
+        "operators": [{"id": operator_id, "name": name} for operator_id, name in operators],
+        "properties": [{"name": name} for name in properties],
+    }
@@ -0,0 +1,153 @@
+"""Write closed years of flares to compressed Parquet snapshots.
+
+Run from the repository root:
+
+    python -m app.utils.flare_snapshots [--year 2021 ...] [--out snapshots]
+
+Without --year, every closed year is written: each year before the current
+one that holds filings, which on Postgres is each yearly partition that no
+longer receives new filings. Snapshots hold the same joined rows as the
+list endpoint and are replaced atomically, so readers never see a partial
+file.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import extract, select
+
+from app.models.flare import Flare
+from app.utils.database import SessionLocal
+from app.utils.flare_partitions import year_bounds
+from app.utils.flare_queries import FLARE_ROW_FIELDS, flare_rows_select
+
+logger = logging.getLogger(__name__)
+
+# Directory snapshots are written to and served from
+SNAPSHOT_DIR = os.getenv("FLARE_SNAPSHOT_DIR", "snapshots")
+
+# Parquet codec; zstd compresses the repetitive text columns well and decodes fast
+SNAPSHOT_COMPRESSION = "zstd"
+
+# Rows fetched from the server-side cursor and written per Parquet row group
+SNAPSHOT_BATCH_SIZE = 50000
+
+# pyarrow is optional, snapshots are unavailable without it. It is imported only when a
+# snapshot is written, so API workers that never write one do not pay for loading it
+SNAPSHOTS_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Arrow type of each non-text field of a flare row
+_FIELD_TYPES = {
+    "id": "int64",
+    "location_id": "int64",
+    "operator_id": "int64",
+    "volume": "float64",
+    "duration": "float64",
+    "h2s": "float64",
+    "latitude": "float64",
+    "longitude": "float64",
+    "submittal_date": "timestamp[us]",
+    "effective_date": "timestamp[us]",
+    "expiration_date": "timestamp[us]",
+    "date": "timestamp[us]",
+}
+
+
+def _schema(pa):
+    return pa.schema(
+        [(name, pa.type_for_alias(_FIELD_TYPES.get(name, "string"))) for name in FLARE_ROW_FIELDS]
+    )
+
+
+def snapshot_path(year, directory=None):
+    return os.path.join(directory or SNAPSHOT_DIR, f"flares_{year}.parquet")
+
+
+def closed_years(db):
+    """Years before the current one that hold at least one filing, oldest first."""
+    year = extract("year", Flare.submittal_date)
+    start_of_year = datetime(datetime.utcnow().year, 1, 1)
+    return sorted(int(y) for y in db.scalars(select(year).distinct().where(Flare.submittal_date < start_of_year)))
+
+
+def write_year_snapshot(db, year, directory=None):
+    """Write the flares submitted in `year` to a Parquet file and return a summary of it.
+
+    The year's rows are read through one range query, which Postgres prunes
+    to that year's partition, and streamed into the file a row group at a
+    time.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = snapshot_path(year, directory)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    start, end = year_bounds(year)
+    query = (
+        flare_rows_select()
+        .where(Flare.submittal_date >= start, Flare.submittal_date < end)
+        .order_by(Flare.submittal_date, Flare.id)
+        .execution_options(yield_per=SNAPSHOT_BATCH_SIZE)
+    )
+
+    schema = _schema(pa)
+    rows = 0
+    partial_path = f"{path}.partial"
+    with pq.ParquetWriter(partial_path, schema, compression=SNAPSHOT_COMPRESSION) as writer:
+        for batch in db.execute(query).partitions():
+            columns = zip(*batch)
+            writer.write_batch(
+                pa.record_batch([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema)
+            )
+            rows += len(batch)
+    os.replace(partial_path, path)
+    logger.info(f"Wrote {rows} flares from {year} to {path}")
+    return {"year": year, "path": path, "rows": rows, "bytes": os.path.getsize(path)}
+
+
+def write_snapshots(db, years=None, directory=None):
+    """Snapshot each of `years`, or every closed year if omitted."""
+    return [write_year_snapshot(db, year, directory) for year in (years or closed_years(db))]
+
+
+def list_snapshots(directory=None):
+    """Summaries of the snapshots on disk, oldest year first."""
+    directory = directory or SNAPSHOT_DIR
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext != ".parquet" or not stem.startswith("flares_") or not stem[len("flares_"):].isdigit():
+            continue
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        snapshots.append(
+            {
+                "year": int(stem[len("flares_"):]),
+                "path": path,
+                "bytes": stat.st_size,
+                "written_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            }
+        )
+    return snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, action="append", help="year to snapshot, repeatable (default: every closed year)")
+    parser.add_argument("--out", default=None, help=f"output directory (default: {SNAPSHOT_DIR})")
+    args = parser.parse_args()
+    if not SNAPSHOTS_AVAILABLE:
+        parser.error("pyarrow is not installed.")
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        for snapshot in write_snapshots(db, args.year, args.out):
+            print(f"{snapshot['year']}: {snapshot['rows']} rows, {snapshot['bytes']} bytes -> {snapshot['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, and_, cast, delete, func, insert, literal, or_, select, text
+
+from app.models.flare import Flare
+from app.models.flare_rollup import FlareActiveRollup, FlareMonthlyRollup
+from app.models.location import Location
+from app.models.operator import Operator
+from app.utils.data_version import bump_data_version
+
+# Stored as the expiration month of exceptions that never expire
+OPEN_ENDED_MONTH = date(9999, 12, 1)
+
+# First key of the Postgres advisory locks serialising refreshes of each rollup table
+ROLLUP_LOCK_KEYS = {
+    FlareMonthlyRollup.__tablename__: 720101,
+    FlareActiveRollup.__tablename__: 720102,
+}
+
+# Rollup columns the stats endpoint can group by
+GROUP_BY_COLUMNS = {
+    "operator": FlareMonthlyRollup.operator_number,
+    "district": FlareMonthlyRollup.fv_district,
+    "status": FlareMonthlyRollup.status,
+    "filing_type": FlareMonthlyRollup.filing_type,
+    "month": FlareMonthlyRollup.month,
+}
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def next_month(value):
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _month_expr(dialect_name, column):
+    """Truncate a timestamp column to the first day of its month in SQL."""
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
+
+
+def _in_months(column, months):
+    """Match timestamps that fall in any of the given months, as index-friendly ranges."""
+    return or_(
+        *(
+            and_(column >= datetime(m.year, m.month, 1), column < datetime.combine(next_month(m), datetime.min.time()))
+            for m in months
+        )
+    )
+
+
+def _lock_months(db, table, months):
+    """Serialise refreshes of the same rollup months until the transaction ends. Postgres only.
+
+    Two writers refreshing one month (a crawl page and a bulk batch, say)
+    would otherwise both delete its rows and then both insert them, and the
+    second insert fails on the primary key under READ COMMITTED. Per-month
+    refreshes hold the table's lock shared and their months' locks
+    exclusively, in month order; a full rebuild (`months` None) holds the
+    table's lock exclusively.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    key = ROLLUP_LOCK_KEYS[table]
+    if months is None:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key, 0)"), {"key": key})
+        return
+    db.execute(text("SELECT pg_advisory_xact_lock_shared(:key, 0)"), {"key": key})
+    for month in sorted(months):
+        db.execute(text("SELECT pg_advisory_xact_lock(:key, :month)"), {"key": key, "month": month.toordinal()})
+
+
+def _refresh_monthly(db, months):
+    dialect_name = db.get_bind().dialect.name
+    _lock_months(db, FlareMonthlyRollup.__tablename__, months)
+    if months is not None:
+        db.execute(delete(FlareMonthlyRollup).where(FlareMonthlyRollup.month.in_(months)))
+    else:
+        db.execute(delete(FlareMonthlyRollup))
+
+    month = _month_expr(dialect_name, Flare.submittal_date)
+    dimensions = [
+        func.coalesce(Operator.operator_number, ""),
+        func.coalesce(Location.name, ""),
+        func.coalesce(Flare.status, ""),
+        func.coalesce(Flare.filing_type, ""),
+    ]
+    query = (
+        select(month, *dimensions, func.count())
+        .select_from(Flare)
+        .outerjoin(Operator, Flare.operator_id == Operator.id)
+        .outerjoin(Location, Flare.location_id == Location.id)
+        .where(Flare.submittal_date.is_not(None))
+    )
+    if months is not None:
+        query = query.where(_in_months(Flare.submittal_date, months))
+    query = query.group_by(month, *dimensions)
+    db.execute(
+        insert(FlareMonthlyRollup).from_select(
+            ["month", "operator_number", "fv_district", "status", "filing_type", "flare_count"], query
+        )
+    )
+
+
+def _refresh_active(db, months):
+    dialect_name = db.get_bind().dialect.name
+    _lock_months(db, FlareActiveRollup.__tablename__, months)
+    if months is not None:
+        db.execute(delete(FlareActiveRollup).where(FlareActiveRollup.effective_month.in_(months)))
+    else:
+        db.execute(delete(FlareActiveRollup))
+
+    effective_month = _month_expr(dialect_name, Flare.effective_date)
+    expiration_month = func.coalesce(_month_expr(dialect_name, Flare.expiration_date), literal(OPEN_ENDED_MONTH, Date))
+    status = func.coalesce(Flare.status, "")
+    query = select(effective_month, expiration_month, status, func.count()).where(Flare.effective_date.is_not(None))
+    if months is not None:
+        query = query.where(_in_months(Flare.effective_date, months))
+    query = query.group_by(effective_month, expiration_month, status)
+    db.execute(
+        insert(FlareActiveRollup).from_select(
+            ["effective_month", "expiration_month", "status", "flare_count"], query
+        )
+    )
+
+
+def refresh_rollups(db, flare_values):
+    """Recount the rollup months touched by a batch of flare rows, inside the caller's transaction.
+
+    Only the submittal and effective months that appear in the batch are
+    recomputed, so the cost follows the size of the page, not of the table.
+    Writers pass the rows as stored before the write along with the new
+    ones, so a month that a filing moved out of is recounted too.
+    """
+    submittal_months = {month_start(v["submittal_date"]) for v in flare_values if v["submittal_date"]}
+    effective_months = {month_start(v["effective_date"]) for v in flare_values if v["effective_date"]}
+    if submittal_months:
+        _refresh_monthly(db, submittal_months)
+    if effective_months:
+        _refresh_active(db, effective_months)
+
+
+def rebuild_rollups(db):
+    """Recount every rollup row from scratch and commit.
+
+    The writers keep the rollups current page by page; this repairs them
+    after flares were changed some other way, such as by hand in SQL.
+    """
+    _refresh_monthly(db, None)
+    _refresh_active(db, None)
+    bump_data_version(db)
+    db.commit()
+
+
+def flare_counts_query(
+    group_by,
+    status=None,
+    filing_type=None,
+    operator_number=None,
+    fv_district=None,
+    month_from=None,
+    month_to=None,
+):
+    """Select (key, count) pairs from the monthly rollup for one dimension."""
+    key = GROUP_BY_COLUMNS[group_by]
+    query = select(key.label("key"), func.sum(FlareMonthlyRollup.flare_count).label("count"))
+    if status is not None:
+        query = query.where(FlareMonthlyRollup.status == status)
+    if filing_type is not None:
+        query = query.where(FlareMonthlyRollup.filing_type == filing_type)
+    if operator_number is not None:
+        query = query.where(FlareMonthlyRollup.operator_number == operator_number)
+    if fv_district is not None:
+        query = query.where(FlareMonthlyRollup.fv_district == fv_district)
+    if month_from is not None:
+        query = query.where(FlareMonthlyRollup.month >= month_start(month_from))
+    if month_to is not None:
+        query = query.where(FlareMonthlyRollup.month <= month_start(month_to))
+    return query.group_by(key).order_by(key)
+
+
+def active_rollup_query(month_from, month_to, status=None):
+    """Select the active-rollup rows that overlap [month_from, month_to]."""
+    query = select(
+        FlareActiveRollup.effective_month, FlareActiveRollup.expiration_month, FlareActiveRollup.flare_count
+    ).where(
+        FlareActiveRollup.effective_month <= month_start(month_to),
+        FlareActiveRollup.expiration_month >= month_start(month_from),
+    )
+    if status is not None:
+        query = query.where(FlareActiveRollup.status == status)
+    return query
+
+
+def active_counts(rows, month_from, month_to):
+    """Turn active-rollup rows into the number of exceptions in effect during each month."""
+    counts = {}
+    month = month_start(month_from)
+    last = month_start(month_to)
+    while month <= last:
+        counts[month] = 0
+        month = next_month(month)
+    for effective_month, expiration_month, flare_count in rows:
+        for month in counts:
+            if effective_month <= month <= expiration_month:
+                counts[month] += flare_count
+    return [{"month": month.isoformat(), "active_count": count} for month, count in counts.items()]
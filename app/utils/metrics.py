@@ -0,0 +1,132 @@
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:  # prometheus_client is optional, metrics are then discarded
+    Histogram = None
+
+METRICS_ENABLED = Histogram is not None
+
+# Buckets for timings that are usually well under a second
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+
+def _histogram(name, documentation, labelnames, buckets=None):
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    if buckets is None:
+        return Histogram(name, documentation, labelnames)
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def _counter(name, documentation, labelnames=()):
+    return Counter(name, documentation, labelnames) if METRICS_ENABLED else _NoopMetric()
+
+
+HTTP_REQUEST_SECONDS = _histogram(
+    "http_request_duration_seconds", "API request latency by route.", ("method", "route", "status")
+)
+DB_QUERY_SECONDS = _histogram(
+    "db_query_duration_seconds", "Time spent executing SQL statements.", ("engine", "statement"), FAST_BUCKETS
+)
+DB_POOL_CHECKOUT_SECONDS = _histogram(
+    "db_pool_checkout_seconds", "Time a request waited for a pooled connection.", ("engine",), FAST_BUCKETS
+)
+SCRAPE_STAGE_SECONDS = _histogram(
+    "scrape_stage_duration_seconds", "Time per results page spent in each scraper stage.", ("stage",)
+)
+SCRAPE_PAGES = _counter("scrape_pages_total", "Results pages committed by the scraper.")
+SCRAPE_ROWS_WRITTEN = _counter("scrape_rows_written_total", "Flares inserted or changed by the scraper.")
+
+
+@contextmanager
+def observe_seconds(metric):
+    """Observe the wall time of the block on a metric (already labelled)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.observe(time.perf_counter() - started)
+
+
+def stage_timer(stage):
+    """Time one scraper stage: navigate, wait, fetch, parse or write."""
+    return observe_seconds(SCRAPE_STAGE_SECONDS.labels(stage=stage))
+
+
+def timed_pool_class(pool_class, engine_name):
+    """A subclass of `pool_class` that times how long each checkout waits on the pool.
+
+    Only the pool's own wait (for a free slot, or to open an overflow
+    connection) is observed, when a session actually checks a connection
+    out; requests that never reach the database cost nothing. The class
+    is reused when the pool is recreated, so the timing survives dispose().
+    """
+    if not METRICS_ENABLED:
+        return pool_class
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            with observe_seconds(DB_POOL_CHECKOUT_SECONDS.labels(engine=engine_name)):
+                return super()._do_get()
+
+    # Keep the pool's log records under the sqlalchemy.pool logger
+    TimedPool.__module__ = pool_class.__module__
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def instrument_engine(engine, engine_name):
+    """Time every statement run on a (sync) engine, labelled by its leading SQL keyword."""
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_SECONDS.labels(engine=engine_name, statement=keyword).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def render_metrics():
+    """Return (body, content type) for /metrics, or None if prometheus_client is not installed.
+
+    With PROMETHEUS_MULTIPROC_DIR set, samples written by every API worker
+    and scraper process are aggregated, not only this process's own.
+    """
+    if not METRICS_ENABLED:
+        return None
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import orjson
+
+from fastapi import Response
+
+from app.utils.data_version import DATA_VERSION_TTL, current_data_version
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional, the in-process cache is the fallback
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response body is kept, and entries kept by the in-process cache
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+# Shared backend for every API worker, e.g. redis://localhost:6379/0 (unset: per-process cache)
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+# Clients may reuse a response for as long as this process trusts its data version
+CACHE_CONTROL = f"public, max-age={int(DATA_VERSION_TTL)}"
+
+
+class MemoryCache:
+    """LRU cache with a per-entry TTL, local to one process."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value, ttl):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCache:
+    """Cache shared by every process through Redis, which handles expiry and eviction."""
+
+    def __init__(self, url):
+        self.client = aioredis.from_url(url)
+
+    async def get(self, key):
+        value = await self.client.get(key)
+        if value is None:
+            return None
+        headers, body = value.split(b"\n", 1)
+        return orjson.loads(headers), body
+
+    async def set(self, key, value, ttl):
+        headers, body = value
+        await self.client.set(key, orjson.dumps(headers) + b"\n" + body, ex=max(1, int(ttl)))
+
+
+def _create_cache():
+    if RESPONSE_CACHE_URL:
+        if aioredis is not None:
+            return RedisCache(RESPONSE_CACHE_URL)
+        logger.warning("RESPONSE_CACHE_URL is set but redis is not installed, using the in-process cache.")
+    return MemoryCache()
+
+
+response_cache = _create_cache()
+
+
+def _request_key(request):
+    """Identify a request by its path and its query parameters, in any order."""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return hashlib.sha1(f"{request.url.path}?{params}".encode()).hexdigest()
+
+
+async def cached_json(request, db, produce):
+    """Answer a read endpoint from the response cache, calling `produce` on a miss.
+
+    `produce` is an async callable returning (payload, headers). Entries are
+    keyed on the data version, so a scraper commit makes every cached body
+    and ETag stale at once without having to find and delete them.
+    """
+    version = await current_data_version(db)
+    key = _request_key(request)
+    etag = f'W/"{version}-{key[:16]}"'
+    cache_headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=cache_headers)
+
+    cache_key = f"flares:{version}:{key}"
+    cached = await response_cache.get(cache_key)
+    if cached is None:
+        payload, headers = await produce()
+        cached = (headers, orjson.dumps(payload))
+        await response_cache.set(cache_key, cached, RESPONSE_CACHE_TTL)
+
+    headers, body = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **cache_headers})
@@ -0,0 +1,114 @@
+"""Scrape worker: runs the crawls the API queues in scrape_runs.
+
+Run one or more alongside the API:
+
+    python -m app.worker [--once]
+
+The worker polls for queued runs and crawls each one in this process, so
+Playwright and the parsers are only ever loaded here, never in an API
+worker. On SIGTERM or SIGINT the current crawl is asked to stop after its
+page, leaving a checkpoint that POST /api/v1/scrape/?resume=true continues.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import platform
+import signal
+import threading
+import time
+
+from app.scarpers.jobs import HEARTBEAT_INTERVAL, claim_next_run, expire_stale_runs, heartbeat, request_cancel
+from app.scarpers.trrc_scraper import scrape_run
+from app.utils.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of an empty queue
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "5"))
+
+
+class _Shutdown:
+    """Turns the first SIGTERM/SIGINT into a graceful stop of this worker's crawl, if it has one.
+
+    Only the run this worker claimed is cancelled; other workers' crawls and
+    runs still waiting in the queue are left alone.
+    """
+
+    def __init__(self):
+        self.requested = False
+        self.run_id = None
+
+    def __call__(self, signum, frame):
+        if self.requested:
+            raise KeyboardInterrupt
+        self.requested = True
+        if self.run_id is None:
+            logger.info(f"Received signal {signum}, exiting.")
+            return
+        logger.info(f"Received signal {signum}, stopping run {self.run_id} after the current page.")
+        with SessionLocal() as db:
+            request_cancel(db, self.run_id)
+
+
+def _send_heartbeats(shutdown):
+    """Check in on the claimed run every HEARTBEAT_INTERVAL, from a thread beside the crawl.
+
+    Checkpoints only move when a page is written, so a crawl busy on a slow
+    page would otherwise look dead and be failed while it still runs.
+    """
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL.total_seconds())
+        run_id = shutdown.run_id
+        if run_id is None:
+            continue
+        try:
+            with SessionLocal() as db:
+                heartbeat(db, run_id)
+        except Exception as e:
+            logger.warning(f"Heartbeat for scrape run {run_id} failed: {e}")
+
+
+def run_worker(once=False):
+    """Claim and crawl queued runs until shut down, or until the queue is empty if `once`."""
+    shutdown = _Shutdown()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    threading.Thread(target=_send_heartbeats, args=(shutdown,), daemon=True).start()
+    logger.info(f"Scrape worker {os.getpid()} polling every {WORKER_POLL_SECONDS}s.")
+
+    while not shutdown.requested:
+        with SessionLocal() as db:
+            expire_stale_runs(db)
+            run_id = shutdown.run_id = claim_next_run(db)
+            if run_id is not None and shutdown.requested:
+                request_cancel(db, run_id)  # The signal arrived while the run was being claimed
+        if run_id is None:
+            if once:
+                break
+            time.sleep(WORKER_POLL_SECONDS)
+            continue
+
+        logger.info(f"Claimed scrape run {run_id}.")
+        try:
+            asyncio.run(scrape_run(run_id))
+        except Exception:
+            logger.exception(f"Scrape run {run_id} failed.")
+        finally:
+            shutdown.run_id = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty instead of polling")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if platform.system() == "Windows":
+        # Playwright drives the browser through subprocesses, which need the proactor loop on Windows
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    run_worker(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Measure how fast an API process cold-starts and how much memory it holds.
+
+Run from the repository root:
+
+    python -m benchmarks.api_startup_benchmark [--runs 5] [--module main --module app.worker] [--serve]
+
+Each run imports the module in a fresh interpreter and reports the import
+time, peak RSS and which of the scraper-only dependencies it loaded. With
+--serve, uvicorn is also started on main:app and timed until it answers
+its first request, with the server's RSS read at that point (Linux only).
+Nothing touches the database: engines connect lazily.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Dependencies only the scrape worker should need
+SCRAPER_ONLY_MODULES = ("playwright", "bs4", "lxml", "selectolax", "httpx", "multiprocessing", "pyarrow")
+
+# Imports the module in a fresh interpreter and prints its cost as JSON
+_IMPORT_PROBE = """
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "scraper_modules": [m for m in {scraper_modules!r} if m in sys.modules],
+}}))
+"""
+
+
+def _env(database_url):
+    return {**os.environ, "DATABASE_URL": database_url}
+
+
+def measure_import(module, database_url):
+    probe = _IMPORT_PROBE.format(module=module, scraper_modules=SCRAPER_ONLY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", probe], env=_env(database_url), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def measure_serve(database_url, timeout=30.0):
+    """Start uvicorn on main:app and time it until the first request succeeds."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=_env(database_url),
+    )
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1).read()
+                break
+            except OSError:
+                if server.poll() is not None or time.perf_counter() - started > timeout:
+                    raise RuntimeError("uvicorn did not start serving.")
+                time.sleep(0.02)
+        return {"seconds": time.perf_counter() - started, "rss_kb": _rss_kb(server.pid)}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _report(label, samples):
+    seconds = [s["seconds"] for s in samples]
+    rss = [s["rss_kb"] for s in samples if s.get("rss_kb") is not None]
+    line = f"{label:<24} median {statistics.median(seconds) * 1000:7.1f} ms  min {min(seconds) * 1000:7.1f} ms"
+    if rss:
+        line += f"  RSS {statistics.median(rss) / 1024:6.1f} MiB"
+    if "modules" in samples[-1]:
+        line += f"  {samples[-1]['modules']} modules"
+        scraper_modules = samples[-1]["scraper_modules"]
+        line += f"  scraper deps: {', '.join(scraper_modules) if scraper_modules else 'none'}"
+    print(line)
+
+
+def run(args):
+    for module in args.module or ["main"]:
+        _report(f"import {module}", [measure_import(module, args.database_url) for _ in range(args.runs)])
+    if args.serve:
+        _report("uvicorn first response", [measure_serve(args.database_url) for _ in range(args.runs)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--module", action="append", help="module to import, repeatable (default: main)")
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn until its first response")
+    parser.add_argument("--database-url", default="sqlite:///api_startup_benchmark.db", help="DATABASE_URL for the processes")
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
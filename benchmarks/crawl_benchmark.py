@@ -0,0 +1,155 @@
+"""Run a full scrape against a recorded SWR-32 crawl and report its throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.crawl_benchmark --recording benchmarks/recordings/swr32 \\
+        [--database-url sqlite:///crawl_benchmark.db] [--fetch-mode http] [--workers 4] [--latency-ms 150]
+
+The recording is served by an in-process benchmarks.replay_server and
+crawled by the real scrape_run. The database tables are created if missing;
+use an empty database, or the upserts will find nothing new to write.
+Reports pages/s, rows/s, the latency of each page commit and peak RSS.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+import uvicorn
+
+from benchmarks.replay_server import create_app, query_url
+from benchmarks.swr32_recording import Recording
+
+
+def _free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _start_replay_server(recording, host, latency_ms, jitter_ms):
+    """Serve the recording from a background thread and return the query URL."""
+    port = _free_port(host)
+    config = uvicorn.Config(create_app(recording, latency_ms, jitter_ms), host=host, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, query_url(recording, host, port)
+
+
+def _peak_rss_mib():
+    """Peak resident set size of this process and of its largest reaped child (the browser), in MiB."""
+    if resource is None:
+        return None, None
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    )
+
+
+def run(args):
+    recording = Recording.load(args.recording)
+    server, url = _start_replay_server(recording, "127.0.0.1", args.latency_ms, args.jitter_ms)
+
+    # The app reads both settings at import time
+    os.environ["SWR32_QUERY_URL"] = url
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import text
+
+    from app.models.scrape_run import ScrapeRun
+    from app.scarpers import trrc_scraper
+    from app.utils.database import Base, SessionLocal, engine
+
+    import app.models.data_version  # noqa: F401  Register every table before create_all
+    import app.models.flare_rollup  # noqa: F401
+
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(engine)
+
+    # Time every page commit made by the crawl's writer
+    write_seconds = []
+    save_flare_page = trrc_scraper.save_flare_page
+
+    def timed_save_flare_page(*save_args):
+        started = time.perf_counter()
+        try:
+            return save_flare_page(*save_args)
+        finally:
+            write_seconds.append(time.perf_counter() - started)
+
+    trrc_scraper.save_flare_page = timed_save_flare_page
+
+    db = SessionLocal()
+    run = ScrapeRun(
+        options={
+            "workers": args.workers,
+            "requests_per_second": args.requests_per_second,
+            "fetch_mode": args.fetch_mode,
+        }
+    )
+    db.add(run)
+    db.commit()
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(trrc_scraper.scrape_run(run.id))
+    except Exception:
+        pass  # scrape_run records the error on the run, reported below
+    elapsed = time.perf_counter() - started
+
+    db.refresh(run)
+    db.close()
+    server.should_exit = True
+
+    print(f"Run {run.id} {run.status} against {recording.pages} recorded pages ({args.fetch_mode}, {args.workers} workers)")
+    if run.error:
+        print(f"  error: {run.error}")
+    print(f"  elapsed     {elapsed:10.2f} s")
+    print(f"  pages       {run.last_page:10d}   {run.last_page / elapsed:10.2f} pages/s")
+    print(f"  rows        {run.rows_written:10d}   {run.rows_written / elapsed:10.1f} rows/s")
+    if write_seconds:
+        ordered = sorted(write_seconds)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(
+            f"  page commit mean {statistics.mean(ordered) * 1000:.1f} ms, "
+            f"p50 {statistics.median(ordered) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, max {ordered[-1] * 1000:.1f} ms"
+        )
+    own_rss, child_rss = _peak_rss_mib()
+    if own_rss is not None:
+        print(f"  peak RSS    {own_rss:10.1f} MiB (this process), {child_rss:.1f} MiB (largest child process)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording", required=True, help="directory written by benchmarks.record_swr32")
+    parser.add_argument("--database-url", default="sqlite:///crawl_benchmark.db", help="database to write to")
+    parser.add_argument("--fetch-mode", choices=("browser", "http"), default="browser")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests-per-second", type=float, default=1000.0, help="scraper pacing, high to measure the pipeline")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay the replay server adds to each response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra delay, up to this much")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep the scraper's INFO logging")
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare the pQueryTable row extractors on the saved HTML fixtures.
+
+Run from the repository root:
+
+    python -m benchmarks.parse_benchmark [--seconds 2]
+
+Every available parser must return exactly the rows the BeautifulSoup
+reference parser returns; the script exits non-zero if one disagrees, so
+it doubles as an offline regression check for parsing.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from app.scarpers.table_parser import PARSERS, parse_rows_bs4
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _rows_per_second(parser, html, expected_rows, seconds):
+    """Run the parser repeatedly for about `seconds` and return its throughput."""
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        parser(html)
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return runs * expected_rows / elapsed, elapsed / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each parser and fixture")
+    args = parser.parse_args()
+
+    failed = False
+    for fixture in sorted(FIXTURES_DIR.glob("pquerytable_*.html")):
+        html = fixture.read_text()
+        expected = parse_rows_bs4(html)
+        print(f"{fixture.name}: {len(expected)} rows, {len(html) / 1024:.0f} KiB")
+
+        for name, extractor in PARSERS.items():
+            if extractor(html) != expected:
+                print(f"  {name:<10} MISMATCH against bs4")
+                failed = True
+                continue
+            if not expected:
+                print(f"  {name:<10} ok")
+                continue
+            rate, per_page = _rows_per_second(extractor, html, len(expected), args.seconds)
+            print(f"  {name:<10} {rate:>12,.0f} rows/s  {per_page * 1000:8.2f} ms/page")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Record a browser crawl of the live SWR-32 query for offline replay.
+
+Run from the repository root:
+
+    python -m benchmarks.record_swr32 --out benchmarks/recordings/swr32 [--pages 20]
+
+The query page, its scripts and stylesheets, the search and every results
+page (as the datatable's partial-response) are written to the output
+directory. Serve them with benchmarks.replay_server, or crawl them directly
+with benchmarks.crawl_benchmark.
+"""
+import argparse
+import asyncio
+from urllib.parse import parse_qsl, urlsplit
+
+from playwright.async_api import async_playwright
+
+from app.scarpers.pacing import RateLimiter
+from app.scarpers.trrc_scraper import SWR32_QUERY_URL, _run_search, _transition
+from benchmarks.swr32_recording import Recording, request_key
+
+# Response headers a replay needs to behave like the original
+KEPT_HEADERS = ("content-type", "location")
+
+
+async def _record_response(recording, host, response):
+    request = response.request
+    if urlsplit(request.url).netloc != host:
+        return
+    form = dict(parse_qsl(request.post_data or "", keep_blank_values=True)) if request.method == "POST" else None
+    try:
+        body = await response.body()
+    except Exception:  # Redirects have no body
+        body = b""
+    headers = {name: value for name, value in (await response.all_headers()).items() if name in KEPT_HEADERS}
+    recording.add(request_key(request.method, request.url, form), response.status, headers, body)
+
+
+async def record(out, pages, requests_per_second):
+    recording = Recording(out, SWR32_QUERY_URL)
+    host = urlsplit(SWR32_QUERY_URL).netloc
+    pending = set()
+    limiter = RateLimiter(requests_per_second)
+
+    def on_response(response):
+        task = asyncio.ensure_future(_record_response(recording, host, response))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
+        context.on("response", on_response)
+        page = await context.new_page()
+
+        recording.rows_per_page = await _run_search(page, limiter)
+        recording.pages = 1
+        while pages is None or recording.pages < pages:
+            next_button = page.locator("a.ui-paginator-next:not(.ui-state-disabled)").first
+            if await next_button.count() == 0:
+                break
+            await _transition(page, next_button.click, limiter)
+            recording.pages += 1
+            print(f"Recorded page {recording.pages}", flush=True)
+
+        await asyncio.gather(*pending)
+        await browser.close()
+
+    recording.save()
+    print(f"Saved {len(recording.responses)} responses for {recording.pages} pages to {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="directory to write the recording to")
+    parser.add_argument("--pages", type=int, default=None, help="stop after this many results pages (default: all)")
+    parser.add_argument("--requests-per-second", type=float, default=1.0, help="pace of requests to the live site")
+    args = parser.parse_args()
+    asyncio.run(record(args.out, args.pages, args.requests_per_second))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Serve a recorded SWR-32 crawl locally, with configurable latency.
+
+Run from the repository root:
+
+    python -m benchmarks.replay_server --recording benchmarks/recordings/swr32 [--latency-ms 150]
+
+then point the scraper at it:
+
+    SWR32_QUERY_URL=http://127.0.0.1:8089/swr32/publicquery.xhtml
+
+Results pages past the end of the recording are answered with an empty
+table, which ends the crawl the same way the last page of the live site does.
+"""
+import argparse
+import asyncio
+import random
+from urllib.parse import parse_qsl, urlsplit
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from benchmarks.swr32_recording import Recording, empty_page_response, request_key
+
+DEFAULT_PORT = 8089
+
+# Content types whose bodies may contain absolute links to the live site
+_TEXT_TYPES = ("text/", "xml", "javascript", "json")
+
+
+def create_app(recording, latency_ms=0.0, jitter_ms=0.0):
+    """Build an app that answers every request from `recording` after a simulated network delay."""
+    app = FastAPI()
+    origin = "{0.scheme}://{0.netloc}".format(urlsplit(recording.base_url)).encode()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def replay(request: Request):
+        delay = latency_ms + random.uniform(0, jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        form = None
+        if request.method == "POST":
+            form = dict(parse_qsl((await request.body()).decode(), keep_blank_values=True))
+        key = request_key(request.method, str(request.url), form)
+        entry = recording.responses.get(tuple(key))
+        if entry is None:
+            if key[0] == "page":
+                return Response(empty_page_response(), media_type="text/xml")
+            return Response(status_code=404)
+
+        # Links back to the live site point at this server instead
+        local_origin = f"{request.url.scheme}://{request.url.netloc}".encode()
+        content_type = entry["headers"].get("content-type", "")
+        body = recording.body(entry)
+        if any(text_type in content_type for text_type in _TEXT_TYPES):
+            body = body.replace(origin, local_origin)
+        headers = {name: value for name, value in entry["headers"].items() if name != "content-type"}
+        if "location" in headers:
+            headers["location"] = headers["location"].replace(origin.decode(), local_origin.decode())
+        return Response(body, status_code=entry["status"], headers=headers, media_type=content_type or None)
+
+    return app
+
+
+def query_url(recording, host, port):
+    """URL of the recorded query page on a local replay server."""
+    parts = urlsplit(recording.base_url)
+    return f"http://{host}:{port}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording", required=True, help="directory written by benchmarks.record_swr32")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra delay, up to this much")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.recording)
+    print(f"Replaying {recording.pages} pages; SWR32_QUERY_URL={query_url(recording, args.host, args.port)}")
+    uvicorn.run(create_app(recording, args.latency_ms, args.jitter_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
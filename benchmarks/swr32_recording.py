@@ -0,0 +1,78 @@
+"""On-disk format shared by the SWR-32 recorder, replay server and crawl benchmark.
+
+A recording is a directory holding manifest.json and one body file per
+response. Responses are looked up by a key derived from the request:
+
+- GET requests by path and query string (the query page and its resources)
+- datatable pagination POSTs by their first-row offset and page size, so
+  the browser paginator and the HTTP pager replay the same response
+- any other POST by path and javax.faces.source
+"""
+import json
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from app.scarpers.ajax_fetch import TABLE_ID
+
+MANIFEST = "manifest.json"
+
+
+def request_key(method, url, form=None):
+    """Return the lookup key of a request, as a JSON-friendly list."""
+    parts = urlsplit(url)
+    form = form or {}
+    if method == "GET":
+        return ["GET", parts.path, parts.query]
+    if form.get(f"{TABLE_ID}_pagination") == "true":
+        return ["page", form.get(f"{TABLE_ID}_first", "0"), form.get(f"{TABLE_ID}_rows", "")]
+    return ["POST", parts.path, form.get("javax.faces.source", "")]
+
+
+def empty_page_response():
+    """Partial-response for a results page past the end of the recording: no rows."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><partial-response><changes>'
+        f'<update id="{TABLE_ID}"><![CDATA[]]></update>'
+        "</changes></partial-response>"
+    )
+
+
+class Recording:
+    """Responses of one recorded crawl, indexed by request key."""
+
+    def __init__(self, directory, base_url, rows_per_page=None, pages=0, responses=None):
+        self.directory = Path(directory)
+        self.base_url = base_url
+        self.rows_per_page = rows_per_page
+        self.pages = pages
+        self.responses = responses or {}
+
+    @classmethod
+    def load(cls, directory):
+        directory = Path(directory)
+        manifest = json.loads((directory / MANIFEST).read_text())
+        responses = {tuple(entry["key"]): entry for entry in manifest["responses"]}
+        return cls(directory, manifest["base_url"], manifest.get("rows_per_page"), manifest.get("pages", 0), responses)
+
+    def add(self, key, status, headers, body):
+        """Store a response body, keeping the first one seen for each key."""
+        key = tuple(key)
+        if key in self.responses:
+            return
+        file_name = f"{len(self.responses):05d}.bin"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / file_name).write_bytes(body)
+        self.responses[key] = {"key": list(key), "status": status, "headers": headers, "file": file_name}
+
+    def body(self, entry):
+        return (self.directory / entry["file"]).read_bytes()
+
+    def save(self):
+        manifest = {
+            "base_url": self.base_url,
+            "rows_per_page": self.rows_per_page,
+            "pages": self.pages,
+            "responses": list(self.responses.values()),
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / MANIFEST).write_text(json.dumps(manifest, indent=1))
@@ -24,3 +24,5 @@ pip install -r requirements.txt
 
 # Install Playwright browsers
 playwright install
+
+# Start command: ./start.sh runs the API and the scrape worker (python -m app.worker) that crawls
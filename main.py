@@ -1,16 +1,38 @@
-import asyncio
-import platform
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+import os
+import time
+from datetime import date, datetime
+from typing import List, Optional, Union
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import logging
-from app.scarpers.trrc_scraper import scrape_trrc  # Import your scraper function
-from app.utils.database import get_db  # Import your database setup
+from app.scarpers.jobs import ScrapeAlreadyRunning, queue_scrape, request_cancel, scrape_progress
+from app.utils.database import get_async_db, get_db  # Import your database setup
 from app.models.flare import Flare  # Import the Flare model
-
-# Set the event loop policy for Windows
-if platform.system() == "Windows":
-    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+from app.schemas.flare import FlareColumnsOut, FlareRowOut
+from app.utils.flare_bulk import bulk_ingest
+from app.utils.flare_export import iter_flares_csv, iter_flares_ndjson
+from app.utils.flare_queries import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    apply_flare_filters,
+    flare_page_query,
+    flare_rows_as_columns,
+    flare_rows_select,
+    locations_near_query,
+    next_cursor,
+    parse_bbox,
+    parse_point,
+    serialize_flare_row,
+    within_radius,
+)
+from app.utils.metrics import HTTP_REQUEST_SECONDS, render_metrics
+from app.utils.response_cache import cached_json
+from app.utils.flare_search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_names
+from app.utils.flare_snapshots import SNAPSHOTS_AVAILABLE, list_snapshots, snapshot_path, write_snapshots
+from app.utils.flare_stats import GROUP_BY_COLUMNS, active_counts, active_rollup_query, flare_counts_query
 
 app = FastAPI()
 
@@ -25,72 +47,262 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "ETag"],  # Let the frontend read the pagination cursor and revalidate
 )
 
-# Global state to track scraping progress
-scraping_state = {
-    "is_running": False,
-    "rows_scraped": 0,
-}
+# Record the latency of every request, labelled by route template rather than raw path
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=str(status),
+        ).observe(time.perf_counter() - started)
+
+# Endpoint for Prometheus to scrape
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    rendered = render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=501, detail="prometheus_client is not installed.")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
 
 @app.post("/api/v1/scrape/")
-def trigger_scrape(background_tasks: BackgroundTasks):
-    if scraping_state["is_running"]:
+def trigger_scrape(
+    incremental: bool = False,
+    resume: bool = False,
+    workers: int = Query(1, ge=1, le=8),
+    requests_per_second: float = Query(1.0, gt=0, le=10),
+    fetch_mode: str = Query("browser", pattern="^(browser|http)$"),
+    db: Session = Depends(get_db),
+):
+    try:
+        run = queue_scrape(
+            db,
+            incremental=incremental,
+            resume=resume,
+            workers=workers,
+            requests_per_second=requests_per_second,
+            fetch_mode=fetch_mode,
+        )
+    except ScrapeAlreadyRunning:
         raise HTTPException(status_code=400, detail="Scraping is already running.")
-
-    scraping_state["is_running"] = True
-    scraping_state["rows_scraped"] = 0
-
-    background_tasks.add_task(scrape_trrc, scraping_state)  # Pass scraping_state
-    return {"message": "Scraping started in the background."}
+    return {"message": "Scraping queued for the scrape worker.", "run_id": run.id}
 
 @app.post("/api/v1/stop-scrape/")
-def stop_scrape():
-    if not scraping_state["is_running"]:
+def stop_scrape(db: Session = Depends(get_db)):
+    outcome = request_cancel(db)
+    if outcome is None:
         raise HTTPException(status_code=400, detail="Scraping is not running.")
-
-    scraping_state["is_running"] = False  # This should stop the scraping loop
-    return {"message": "Scraping stopped."}
+    if outcome == "stopped":
+        return {"message": "Queued scraping was stopped before it started."}
+    return {"message": "Scraping will stop after the current page."}
 
 @app.get("/api/v1/scraping-progress/")
-def get_scraping_progress():
-    return {
-        "is_running": scraping_state["is_running"],
-        "rows_scraped": scraping_state["rows_scraped"],
+def get_scraping_progress(db: Session = Depends(get_db)):
+    return scrape_progress(db)
+
+async def flare_filters(
+    status: Optional[str] = None,
+    filing_type: Optional[str] = None,
+    operator_number: Optional[str] = None,
+    fv_district: Optional[str] = None,
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    expires_from: Optional[datetime] = None,
+    expires_to: Optional[datetime] = None,
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    near: Optional[str] = Query(None, description="lat,lon"),
+    radius: Optional[float] = Query(None, gt=0, le=2000, description="Kilometres around `near`"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Query parameters shared by every flare read endpoint."""
+    filters = {
+        "status": status,
+        "filing_type": filing_type,
+        "operator_number": operator_number,
+        "fv_district": fv_district,
+        "submitted_from": submitted_from,
+        "submitted_to": submitted_to,
+        "expires_from": expires_from,
+        "expires_to": expires_to,
     }
+    try:
+        if bbox is not None:
+            filters["bbox"] = parse_bbox(bbox)
+        if (near is None) != (radius is None):
+            raise ValueError("near and radius must be given together.")
+        if near is not None:
+            latitude, longitude = parse_point(near)
+            # Box-filter the locations on the index, then keep the exact matches
+            candidates = (await db.execute(locations_near_query(latitude, longitude, radius))).all()
+            filters["location_ids"] = within_radius(candidates, latitude, longitude, radius)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return filters
 
-# Endpoint to fetch flares data
-@app.get("/api/v1/flares/")
-def get_flares(db: Session = Depends(get_db)):
+# Endpoint to fetch flares data, one keyset page at a time
+@app.get("/api/v1/flares/", response_model=Union[List[FlareRowOut], FlareColumnsOut])
+async def get_flares(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    layout: str = Query("rows", pattern="^(rows|columns)$"),
+    filters: dict = Depends(flare_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
     try:
-        flares = db.query(Flare).all()
-        return [
-            {
-                "id": flare.id,
-                "exception_number": flare.exception_number,
-                "submittal_date": flare.submittal_date.isoformat() if flare.submittal_date else None,
-                "filing_number": flare.filing_number,
-                "status": flare.status,
-                "filing_type": flare.filing_type,
-                "operator_number": flare.operator_number,
-                "operator_name": flare.operator_name,
-                "property": flare.property,
-                "effective_date": flare.effective_date.isoformat() if flare.effective_date else None,
-                "expiration_date": flare.expiration_date.isoformat() if flare.expiration_date else None,
-                "fv_district": flare.fv_district,
-                "location_id": flare.location_id,
-                "operator_id": flare.operator_id,
-                "volume": flare.volume if hasattr(flare, "volume") else None,
-                "duration": flare.duration if hasattr(flare, "duration") else None,
-                "h2s": flare.h2s if hasattr(flare, "h2s") else None,
-                "date": flare.date.isoformat() if flare.date else None,
-                "latitude": float(flare.location.coordinates.split(",")[0].strip()) if flare.location and flare.location.coordinates else None,  # Parse latitude
-                "longitude": float(flare.location.coordinates.split(",")[1].strip()) if flare.location and flare.location.coordinates else None,  # Parse longitude
-                "location": flare.location.name if flare.location else "Unknown",
-                "operator": flare.operator.name if flare.operator else "Unknown",
-            }
-            for flare in flares
-        ]
+        query = flare_page_query(cursor=cursor, limit=limit, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def produce():
+        try:
+            rows = (await db.execute(query)).all()
+        except Exception as e:
+            logger.error(f"Error fetching flares: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        cursor_after = next_cursor(rows, limit)
+        headers = {"X-Next-Cursor": cursor_after} if cursor_after else {}
+        if layout == "columns":
+            return flare_rows_as_columns(rows), headers
+        return [serialize_flare_row(row) for row in rows], headers
+
+    return await cached_json(request, db, produce)
+
+# Endpoint to stream every matching flare for bulk downloads
+@app.get("/api/v1/flares/export")
+async def export_flares(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: dict = Depends(flare_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # The stream reads on its own connection; release the one a `near` lookup may hold, so no
+    # transaction sits idle for the length of the download
+    await db.close()
+    query = apply_flare_filters(flare_rows_select(), **filters).order_by(Flare.id)
+    if format == "csv":
+        return StreamingResponse(
+            iter_flares_csv(query),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="flares.csv"'},
+        )
+    return StreamingResponse(iter_flares_ndjson(query), media_type="application/x-ndjson")
+
+# Endpoint to load flares from an NDJSON or CSV body, validated and merged batch by batch
+@app.post("/api/v1/flares/bulk")
+async def bulk_load_flares(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        summary = await bulk_ingest(db, request.stream(), format)
     except Exception as e:
-        logger.error(f"Error fetching flares: {e}")
+        logger.error(f"Error loading flares: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if summary["failed_batch"] is not None:
+        # The batches before the failed one are committed; report them along with the failure
+        raise HTTPException(status_code=500, detail=summary)
+    return summary
+
+# Endpoint to list the Parquet snapshots of closed years
+@app.get("/api/v1/flares/snapshots")
+def get_flare_snapshots():
+    return [
+        {"year": s["year"], "bytes": s["bytes"], "written_at": s["written_at"], "url": f"/api/v1/flares/snapshots/{s['year']}"}
+        for s in list_snapshots()
+    ]
+
+# Endpoint to write Parquet snapshots of the given years, or of every closed year
+@app.post("/api/v1/flares/snapshots")
+def create_flare_snapshots(year: Optional[List[int]] = Query(None), db: Session = Depends(get_db)):
+    if not SNAPSHOTS_AVAILABLE:
+        raise HTTPException(status_code=501, detail="pyarrow is not installed.")
+    try:
+        snapshots = write_snapshots(db, year)
+    except Exception as e:
+        logger.error(f"Error writing flare snapshots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return [{"year": s["year"], "rows": s["rows"], "bytes": s["bytes"]} for s in snapshots]
+
+# Endpoint to download the Parquet snapshot of one year
+@app.get("/api/v1/flares/snapshots/{year}")
+def download_flare_snapshot(year: int):
+    path = snapshot_path(year)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"No snapshot for {year}.")
+    return FileResponse(path, media_type="application/vnd.apache.parquet", filename=os.path.basename(path))
+
+# Endpoint to count flares per dimension value, read from the monthly rollup
+@app.get("/api/v1/flares/stats")
+async def get_flare_stats(
+    request: Request,
+    group_by: str = Query(..., pattern=f"^({'|'.join(GROUP_BY_COLUMNS)})$"),
+    status: Optional[str] = None,
+    filing_type: Optional[str] = None,
+    operator_number: Optional[str] = None,
+    fv_district: Optional[str] = None,
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = flare_counts_query(
+        group_by,
+        status=status,
+        filing_type=filing_type,
+        operator_number=operator_number,
+        fv_district=fv_district,
+        month_from=month_from,
+        month_to=month_to,
+    )
+
+    async def produce():
+        rows = (await db.execute(query)).all()
+        return [
+            {"key": key.isoformat() if isinstance(key, date) else key, "count": count}
+            for key, count in rows
+        ], {}
+
+    return await cached_json(request, db, produce)
+
+# Endpoint to count the exceptions in effect during each month of a range
+@app.get("/api/v1/flares/stats/active")
+async def get_active_flare_stats(
+    request: Request,
+    start: date,
+    end: date,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end.")
+
+    async def produce():
+        rows = (await db.execute(active_rollup_query(start, end, status=status))).all()
+        return active_counts(rows, start, end), {}
+
+    return await cached_json(request, db, produce)
+
+# Endpoint to find operators and properties by name; prefix=true serves typeahead from memory
+@app.get("/api/v1/search")
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    prefix: bool = False,
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def produce():
+        return await search_names(db, q.strip(), limit, prefix=prefix), {}
+
+    return await cached_json(request, db, produce)
@@ -2,6 +2,9 @@ from logging.config import fileConfig
 from app.models.flare import Flare
 from app.models.operator import Operator
 from app.models.location import Location
+from app.models.scrape_run import ScrapeRun
+from app.models.flare_rollup import FlareMonthlyRollup, FlareActiveRollup
+from app.models.data_version import DataVersion
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
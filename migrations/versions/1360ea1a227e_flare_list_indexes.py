@@ -0,0 +1,33 @@
+"""flare list indexes
+
+Revision ID: 1360ea1a227e
+Revises: b2284f80a514
+Create Date: 2026-10-17 09:12:04.518311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1360ea1a227e'
+down_revision: Union[str, None] = 'b2284f80a514'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_flares_submittal_date_id', 'flares', ['submittal_date', 'id'], unique=False)
+    op.create_index('ix_flares_status_submittal_date_id', 'flares', ['status', 'submittal_date', 'id'], unique=False)
+    op.create_index('ix_flares_filing_type_submittal_date_id', 'flares', ['filing_type', 'submittal_date', 'id'], unique=False)
+    op.create_index('ix_flares_operator_number_submittal_date_id', 'flares', ['operator_number', 'submittal_date', 'id'], unique=False)
+    op.create_index('ix_flares_fv_district_submittal_date_id', 'flares', ['fv_district', 'submittal_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_flares_fv_district_submittal_date_id', table_name='flares')
+    op.drop_index('ix_flares_operator_number_submittal_date_id', table_name='flares')
+    op.drop_index('ix_flares_filing_type_submittal_date_id', table_name='flares')
+    op.drop_index('ix_flares_status_submittal_date_id', table_name='flares')
+    op.drop_index('ix_flares_submittal_date_id', table_name='flares')
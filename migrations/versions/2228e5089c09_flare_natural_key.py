@@ -0,0 +1,40 @@
+"""flare natural key
+
+Revision ID: 2228e5089c09
+Revises: 5da1db74b8d3
+Create Date: 2026-10-17 11:26:52.730146
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2228e5089c09'
+down_revision: Union[str, None] = '5da1db74b8d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop the duplicates left by earlier full re-scrapes, keeping the oldest row
+    op.execute(
+        """
+        DELETE FROM flares
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY exception_number, filing_number ORDER BY id
+                ) AS duplicate_rank
+                FROM flares
+            ) ranked
+            WHERE duplicate_rank > 1
+        )
+        """
+    )
+    op.create_unique_constraint('uq_flares_exception_number_filing_number', 'flares', ['exception_number', 'filing_number'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_flares_exception_number_filing_number', 'flares', type_='unique')
@@ -0,0 +1,41 @@
+"""scrape job control
+
+Revision ID: 24df5cfabe27
+Revises: 78e74cff9dbd
+Create Date: 2026-10-17 15:21:07.640319
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '24df5cfabe27'
+down_revision: Union[str, None] = '78e74cff9dbd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scrape_runs', sa.Column('options', sa.JSON(), nullable=True))
+    op.add_column('scrape_runs', sa.Column('cancel_requested', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+    op.add_column('scrape_runs', sa.Column('pid', sa.Integer(), nullable=True))
+
+    # Runs left "running" by the old in-process scraper can never finish now
+    op.execute("UPDATE scrape_runs SET status = 'failed' WHERE status = 'running'")
+    op.create_index(
+        'uq_scrape_runs_active',
+        'scrape_runs',
+        [sa.text("(status IN ('queued', 'running'))")],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_scrape_runs_active', table_name='scrape_runs')
+    op.drop_column('scrape_runs', 'pid')
+    op.drop_column('scrape_runs', 'cancel_requested')
+    op.drop_column('scrape_runs', 'options')
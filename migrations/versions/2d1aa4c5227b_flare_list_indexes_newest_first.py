@@ -0,0 +1,41 @@
+"""flare list indexes newest first
+
+Revision ID: 2d1aa4c5227b
+Revises: f36088f362b6
+Create Date: 2026-10-18 09:41:07.215536
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d1aa4c5227b'
+down_revision: Union[str, None] = 'f36088f362b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, columns) of the composite indexes the list endpoint filters and pages with
+LIST_INDEXES = [
+    ('ix_flares_submittal_date_id', ['submittal_date', 'id']),
+    ('ix_flares_status_submittal_date_id', ['status', 'submittal_date', 'id']),
+    ('ix_flares_filing_type_submittal_date_id', ['filing_type', 'submittal_date', 'id']),
+    ('ix_flares_operator_id_submittal_date_id', ['operator_id', 'submittal_date', 'id']),
+    ('ix_flares_location_id_submittal_date_id', ['location_id', 'submittal_date', 'id']),
+]
+
+# Key order of the list endpoint: (submittal_date DESC NULLS LAST, id DESC)
+NEWEST_FIRST = {'submittal_date': 'DESC NULLS LAST', 'id': 'DESC'}
+
+
+def upgrade() -> None:
+    for name, columns in LIST_INDEXES:
+        op.drop_index(name, table_name='flares')
+        op.create_index(name, 'flares', columns, unique=False, postgresql_ops=NEWEST_FIRST)
+
+
+def downgrade() -> None:
+    for name, columns in LIST_INDEXES:
+        op.drop_index(name, table_name='flares')
+        op.create_index(name, 'flares', columns, unique=False)
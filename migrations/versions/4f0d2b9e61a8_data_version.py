@@ -0,0 +1,33 @@
+"""data version
+
+Revision ID: 4f0d2b9e61a8
+Revises: e83f10b6a7c2
+Create Date: 2026-10-17 17:20:36.904415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f0d2b9e61a8'
+down_revision: Union[str, None] = 'e83f10b6a7c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'data_version',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO data_version (id, version, updated_at) VALUES (1, 0, CURRENT_TIMESTAMP)")
+
+
+def downgrade() -> None:
+    op.drop_table('data_version')
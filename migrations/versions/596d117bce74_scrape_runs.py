@@ -0,0 +1,40 @@
+"""scrape runs
+
+Revision ID: 596d117bce74
+Revises: 2228e5089c09
+Create Date: 2026-10-17 12:40:18.066935
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '596d117bce74'
+down_revision: Union[str, None] = '2228e5089c09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scrape_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('incremental', sa.Boolean(), nullable=False),
+        sa.Column('last_page', sa.Integer(), nullable=False),
+        sa.Column('rows_written', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_scrape_runs_id'), 'scrape_runs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scrape_runs_id'), table_name='scrape_runs')
+    op.drop_table('scrape_runs')
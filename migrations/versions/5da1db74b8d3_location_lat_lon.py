@@ -0,0 +1,47 @@
+"""location lat lon
+
+Revision ID: 5da1db74b8d3
+Revises: 1360ea1a227e
+Create Date: 2026-10-17 10:03:41.902217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5da1db74b8d3'
+down_revision: Union[str, None] = '1360ea1a227e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('locations', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('locations', sa.Column('longitude', sa.Float(), nullable=True))
+
+    # Move the free-text "lat,lon" strings into the numeric columns
+    op.execute(
+        """
+        UPDATE locations
+        SET latitude = CAST(TRIM(SPLIT_PART(coordinates, ',', 1)) AS DOUBLE PRECISION),
+            longitude = CAST(TRIM(SPLIT_PART(coordinates, ',', 2)) AS DOUBLE PRECISION)
+        WHERE coordinates ~ '^\\s*-?[0-9.]+\\s*,\\s*-?[0-9.]+\\s*$'
+        """
+    )
+    op.drop_column('locations', 'coordinates')
+
+
+def downgrade() -> None:
+    op.add_column('locations', sa.Column('coordinates', sa.VARCHAR(), autoincrement=False, nullable=True))
+    op.execute(
+        """
+        UPDATE locations
+        SET coordinates = latitude::text || ',' || longitude::text
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """
+    )
+    op.drop_column('locations', 'longitude')
+    op.drop_column('locations', 'latitude')
@@ -0,0 +1,26 @@
+"""scrape run page size
+
+Revision ID: 78e74cff9dbd
+Revises: 596d117bce74
+Create Date: 2026-10-17 14:05:33.184529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '78e74cff9dbd'
+down_revision: Union[str, None] = '596d117bce74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scrape_runs', sa.Column('page_size', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scrape_runs', 'page_size')
@@ -0,0 +1,68 @@
+"""flare rollups
+
+Revision ID: 9c41e7a2d5b6
+Revises: 24df5cfabe27
+Create Date: 2026-10-17 16:02:44.118392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41e7a2d5b6'
+down_revision: Union[str, None] = '24df5cfabe27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'flare_monthly_rollups',
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('operator_number', sa.String(), nullable=False),
+        sa.Column('fv_district', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('filing_type', sa.String(), nullable=False),
+        sa.Column('flare_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('month', 'operator_number', 'fv_district', 'status', 'filing_type'),
+    )
+    op.create_table(
+        'flare_active_rollups',
+        sa.Column('effective_month', sa.Date(), nullable=False),
+        sa.Column('expiration_month', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('flare_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('effective_month', 'expiration_month', 'status'),
+    )
+
+    # Backfill from the existing flares; the scraper keeps them current from here on
+    op.execute(
+        """
+        INSERT INTO flare_monthly_rollups (month, operator_number, fv_district, status, filing_type, flare_count)
+        SELECT CAST(date_trunc('month', submittal_date) AS DATE),
+               COALESCE(operator_number, ''), COALESCE(fv_district, ''),
+               COALESCE(status, ''), COALESCE(filing_type, ''), COUNT(*)
+        FROM flares
+        WHERE submittal_date IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO flare_active_rollups (effective_month, expiration_month, status, flare_count)
+        SELECT CAST(date_trunc('month', effective_date) AS DATE),
+               COALESCE(CAST(date_trunc('month', expiration_date) AS DATE), DATE '9999-12-01'),
+               COALESCE(status, ''), COUNT(*)
+        FROM flares
+        WHERE effective_date IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('flare_active_rollups')
+    op.drop_table('flare_monthly_rollups')
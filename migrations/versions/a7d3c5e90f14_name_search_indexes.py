@@ -0,0 +1,43 @@
+"""name search indexes
+
+Revision ID: a7d3c5e90f14
+Revises: 4f0d2b9e61a8
+Create Date: 2026-10-17 17:58:03.271946
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3c5e90f14'
+down_revision: Union[str, None] = '4f0d2b9e61a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, column) of every trigram index
+TRIGRAM_INDEXES = [
+    ('ix_operators_name_trgm', 'operators', 'name'),
+    ('ix_flares_property_trgm', 'flares', 'property'),
+    ('ix_flares_operator_name_trgm', 'flares', 'operator_name'),
+]
+
+
+def _is_postgresql() -> bool:
+    return context.get_context().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if _is_postgresql():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(name, table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+    else:
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(name, table, [column], unique=False)
+
+
+def downgrade() -> None:
+    for name, table, column in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,100 @@
+"""normalize flare dimensions
+
+Revision ID: c5b81f3e2d07
+Revises: a7d3c5e90f14
+Create Date: 2026-10-17 18:41:57.603218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5b81f3e2d07'
+down_revision: Union[str, None] = 'a7d3c5e90f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Operators were keyed by name; the RRC operator number becomes the key
+    op.add_column('operators', sa.Column('operator_number', sa.String(), nullable=True))
+    op.drop_index('ix_operators_name', table_name='operators')
+    op.create_index('ix_operators_name', 'operators', ['name'], unique=False)
+
+    # One operator per number, named as in its most recent filing
+    op.execute(
+        """
+        INSERT INTO operators (name, operator_number)
+        SELECT DISTINCT ON (operator_number) operator_name, operator_number
+        FROM flares
+        WHERE operator_number IS NOT NULL
+        ORDER BY operator_number, submittal_date DESC NULLS LAST, id DESC
+        """
+    )
+    op.execute(
+        """
+        UPDATE flares SET operator_id = operators.id
+        FROM operators
+        WHERE operators.operator_number = flares.operator_number
+          AND flares.operator_id IS DISTINCT FROM operators.id
+        """
+    )
+    # Name-keyed operators that no filing points at any more
+    op.execute(
+        """
+        DELETE FROM operators
+        WHERE operator_number IS NULL
+          AND NOT EXISTS (SELECT 1 FROM flares WHERE flares.operator_id = operators.id)
+        """
+    )
+    op.create_unique_constraint('uq_operators_operator_number', 'operators', ['operator_number'])
+
+    # Every district a filing names must have its location before the text column goes
+    op.execute(
+        """
+        INSERT INTO locations (name)
+        SELECT DISTINCT fv_district FROM flares
+        WHERE fv_district IS NOT NULL
+        ON CONFLICT (name) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        UPDATE flares SET location_id = locations.id
+        FROM locations
+        WHERE locations.name = flares.fv_district
+          AND flares.location_id IS DISTINCT FROM locations.id
+        """
+    )
+
+    op.drop_index('ix_flares_operator_name_trgm', table_name='flares')
+    op.drop_index('ix_flares_fv_district_submittal_date_id', table_name='flares')
+    op.drop_index('ix_flares_operator_number_submittal_date_id', table_name='flares')
+    op.create_index('ix_flares_operator_id_submittal_date_id', 'flares', ['operator_id', 'submittal_date', 'id'], unique=False)
+    op.drop_column('flares', 'operator_name')
+    op.drop_column('flares', 'operator_number')
+    op.drop_column('flares', 'fv_district')
+
+
+def downgrade() -> None:
+    op.add_column('flares', sa.Column('fv_district', sa.String(), nullable=True))
+    op.add_column('flares', sa.Column('operator_number', sa.String(), nullable=True))
+    op.add_column('flares', sa.Column('operator_name', sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE flares SET operator_number = operators.operator_number, operator_name = operators.name
+        FROM operators WHERE operators.id = flares.operator_id
+        """
+    )
+    op.execute("UPDATE flares SET fv_district = locations.name FROM locations WHERE locations.id = flares.location_id")
+    op.drop_index('ix_flares_operator_id_submittal_date_id', table_name='flares')
+    op.create_index('ix_flares_operator_number_submittal_date_id', 'flares', ['operator_number', 'submittal_date', 'id'], unique=False)
+    op.create_index('ix_flares_fv_district_submittal_date_id', 'flares', ['fv_district', 'submittal_date', 'id'], unique=False)
+    op.create_index('ix_flares_operator_name_trgm', 'flares', ['operator_name'], unique=False, postgresql_using='gin', postgresql_ops={'operator_name': 'gin_trgm_ops'})
+
+    # Operator names are no longer unique, so the old unique index on name is not restored
+    op.drop_constraint('uq_operators_operator_number', 'operators', type_='unique')
+    op.drop_column('operators', 'operator_number')
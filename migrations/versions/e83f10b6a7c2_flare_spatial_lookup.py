@@ -0,0 +1,55 @@
+"""flare spatial lookup
+
+Revision ID: e83f10b6a7c2
+Revises: 9c41e7a2d5b6
+Create Date: 2026-10-17 16:48:12.530871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83f10b6a7c2'
+down_revision: Union[str, None] = '9c41e7a2d5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# District centres at the time of this migration, see app/scarpers/districts.py
+DISTRICT_COORDINATES = {
+    '01': (29.20, -98.90),
+    '02': (28.70, -97.30),
+    '03': (29.80, -95.60),
+    '04': (27.30, -98.10),
+    '05': (31.80, -96.40),
+    '06': (32.30, -94.70),
+    '6E': (32.40, -94.90),
+    '7B': (32.50, -99.40),
+    '7C': (31.20, -100.90),
+    '08': (31.70, -102.70),
+    '8A': (33.30, -102.10),
+    '09': (33.40, -98.00),
+    '10': (35.60, -101.30),
+}
+
+
+def upgrade() -> None:
+    op.create_index('ix_locations_latitude_longitude', 'locations', ['latitude', 'longitude'], unique=False)
+    op.create_index('ix_flares_location_id_submittal_date_id', 'flares', ['location_id', 'submittal_date', 'id'], unique=False)
+
+    # The scraper stored every district at 0,0; unknown districts get no position at all
+    op.execute("UPDATE locations SET latitude = NULL, longitude = NULL WHERE latitude = 0 AND longitude = 0")
+    locations = sa.table('locations', sa.column('name', sa.String), sa.column('latitude', sa.Float), sa.column('longitude', sa.Float))
+    for name, (latitude, longitude) in DISTRICT_COORDINATES.items():
+        op.execute(
+            locations.update()
+            .where(sa.func.upper(sa.func.trim(locations.c.name)).in_([name, name.lstrip('0')]))
+            .values(latitude=latitude, longitude=longitude)
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_flares_location_id_submittal_date_id', table_name='flares')
+    op.drop_index('ix_locations_latitude_longitude', table_name='locations')
@@ -0,0 +1,163 @@
+"""partition flares by submittal date
+
+Revision ID: f36088f362b6
+Revises: c5b81f3e2d07
+Create Date: 2026-10-17 20:12:36.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f36088f362b6'
+down_revision: Union[str, None] = 'c5b81f3e2d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every column of flares, in the order both table layouts are created with
+FLARE_COLUMNS = (
+    'id', 'exception_number', 'submittal_date', 'filing_number', 'status', 'filing_type', 'property',
+    'effective_date', 'expiration_date', 'location_id', 'operator_id', 'volume', 'duration', 'h2s', 'date',
+)
+
+# (index, columns) of the composite indexes the list endpoint filters with
+LIST_INDEXES = [
+    ('ix_flares_id', ['id']),
+    ('ix_flares_submittal_date_id', ['submittal_date', 'id']),
+    ('ix_flares_status_submittal_date_id', ['status', 'submittal_date', 'id']),
+    ('ix_flares_filing_type_submittal_date_id', ['filing_type', 'submittal_date', 'id']),
+    ('ix_flares_operator_id_submittal_date_id', ['operator_id', 'submittal_date', 'id']),
+    ('ix_flares_location_id_submittal_date_id', ['location_id', 'submittal_date', 'id']),
+]
+
+# Years before this one share the default partition with undated filings
+FIRST_PARTITION_YEAR = 2000
+
+
+def _is_postgresql() -> bool:
+    return context.get_context().dialect.name == 'postgresql'
+
+
+def _create_flares_table(*constraints, **kw) -> None:
+    op.create_table(
+        'flares',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('flares_id_seq'::regclass)"), nullable=False),
+        sa.Column('exception_number', sa.String(), nullable=True),
+        sa.Column('submittal_date', sa.DateTime(), nullable=True),
+        sa.Column('filing_number', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('filing_type', sa.String(), nullable=True),
+        sa.Column('property', sa.String(), nullable=True),
+        sa.Column('effective_date', sa.DateTime(), nullable=True),
+        sa.Column('expiration_date', sa.DateTime(), nullable=True),
+        sa.Column('location_id', sa.Integer(), sa.ForeignKey('locations.id'), nullable=True),
+        sa.Column('operator_id', sa.Integer(), sa.ForeignKey('operators.id'), nullable=True),
+        sa.Column('volume', sa.Float(), nullable=True),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.Column('h2s', sa.Float(), nullable=True),
+        sa.Column('date', sa.DateTime(), nullable=True),
+        *constraints,
+        **kw,
+    )
+
+
+def _move_rows_from(old_table: str) -> None:
+    """Copy every row of the renamed table into the new flares, then drop it with its indexes."""
+    columns = ', '.join(FLARE_COLUMNS)
+    op.execute(f'INSERT INTO flares ({columns}) SELECT {columns} FROM {old_table}')
+    # The id sequence outlives the old table
+    op.execute('ALTER SEQUENCE flares_id_seq OWNED BY flares.id')
+    op.execute(f'DROP TABLE {old_table}')
+
+
+def _create_indexes() -> None:
+    for name, columns in LIST_INDEXES:
+        op.create_index(name, 'flares', columns, unique=False)
+    op.create_index('ix_flares_property_trgm', 'flares', ['property'], unique=False, postgresql_using='gin', postgresql_ops={'property': 'gin_trgm_ops'})
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        with op.batch_alter_table('flares') as batch:
+            batch.drop_constraint('uq_flares_exception_number_filing_number', type_='unique')
+            batch.create_unique_constraint('uq_flares_exception_number_filing_number_submittal_date', ['exception_number', 'filing_number', 'submittal_date'])
+        return
+
+    # The natural key below needs UNIQUE NULLS NOT DISTINCT; fail before touching the table without it
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF current_setting('server_version_num')::integer < 150000 THEN
+                RAISE EXCEPTION 'Partitioning flares needs PostgreSQL 15 or later (UNIQUE NULLS NOT DISTINCT), this server runs %',
+                    current_setting('server_version');
+            END IF;
+        END $$
+        """
+    )
+
+    # Rebuild flares as a table range-partitioned by submittal year, loaded before its indexes exist
+    op.rename_table('flares', 'flares_heap')
+    _create_flares_table(postgresql_partition_by='RANGE (submittal_date)')
+    op.execute('CREATE TABLE flares_default PARTITION OF flares DEFAULT')
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            last_year integer := extract(year FROM now())::integer + 1;
+            first_year integer;
+        BEGIN
+            SELECT greatest(coalesce(min(extract(year FROM submittal_date))::integer, last_year), {FIRST_PARTITION_YEAR})
+            INTO first_year FROM flares_heap;
+            FOR y IN least(first_year, last_year - 1)..last_year LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF flares FOR VALUES FROM (%L) TO (%L)',
+                    'flares_y' || y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+                );
+            END LOOP;
+        END $$
+        """
+    )
+    _move_rows_from('flares_heap')
+
+    # A unique constraint on a partitioned table must include the partition key
+    op.create_unique_constraint(
+        'uq_flares_exception_number_filing_number_submittal_date',
+        'flares',
+        ['exception_number', 'filing_number', 'submittal_date'],
+        postgresql_nulls_not_distinct=True,
+    )
+    _create_indexes()
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        with op.batch_alter_table('flares') as batch:
+            batch.drop_constraint('uq_flares_exception_number_filing_number_submittal_date', type_='unique')
+            batch.create_unique_constraint('uq_flares_exception_number_filing_number', ['exception_number', 'filing_number'])
+        return
+
+    op.rename_table('flares', 'flares_partitioned')
+    _create_flares_table(sa.PrimaryKeyConstraint('id', name='flares_pkey'))
+    _move_rows_from('flares_partitioned')
+
+    # The writers keep one row per filing; should concurrent writes have left two, keep the latest
+    op.execute(
+        """
+        DELETE FROM flares
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY exception_number, filing_number ORDER BY submittal_date DESC NULLS LAST, id DESC
+                ) AS duplicate_rank
+                FROM flares
+            ) ranked
+            WHERE duplicate_rank > 1
+        )
+        """
+    )
+    op.create_unique_constraint('uq_flares_exception_number_filing_number', 'flares', ['exception_number', 'filing_number'])
+    _create_indexes()
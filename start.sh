@@ -0,0 +1,29 @@
+#!/bin/sh
+# Start the API and a scrape worker that runs the crawls it queues.
+# Set RUN_SCRAPE_WORKER=0 when workers run as their own service (python -m app.worker).
+
+# Both processes write their metrics here, so the API's /metrics also reports the crawls.
+# It is cleared first: samples left by a previous container run would be counted again.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+rm -f "$PROMETHEUS_MULTIPROC_DIR"/*.db
+
+uvicorn main:app --host 0.0.0.0 --port "${PORT:-10000}" &
+API_PID=$!
+
+WORKER_PID=
+if [ "${RUN_SCRAPE_WORKER:-1}" != "0" ]; then
+    python -m app.worker &
+    WORKER_PID=$!
+fi
+
+# Pass stop signals on, so the worker can checkpoint its crawl before exiting
+trap 'kill -TERM $API_PID $WORKER_PID 2>/dev/null' TERM INT
+
+wait $API_PID
+status=$?
+if [ -n "$WORKER_PID" ]; then
+    kill -TERM $WORKER_PID 2>/dev/null
+    wait $WORKER_PID
+fi
+exit $status